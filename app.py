@@ -1,11 +1,20 @@
-import streamlit as st
-import joblib
-import pickle
-import re
 import os
-import pandas as pd
-import numpy as np
-import random
+import time
+
+import streamlit as st
+
+from comfort_responses import MESSAGES, ROUTINES, get_clinical_message
+from history_db import get_history_db, is_user_id, new_user_id
+from inference_engine import get_engine
+from long_text import analyze_long_text, is_long_text
+from model_registry import get_registry, preload_registry, start_watcher
+from model_utils import fallback_predict, input_metrics, lexicon_hits, normalize, predict_with_model
+from session_export import EXPORT_FORMATS, render_export
+from session_history import SessionHistory, make_entry
+from stage_metrics import METRICS, METRICS_FILE_ENV, timed
+from term_attribution import cached_explanation, explain_text
+
+RERUN_START = time.perf_counter()
 
 st.set_page_config(page_title="Mindful — Emotional Assistant", layout="wide", page_icon="💛")
 
@@ -139,250 +148,41 @@ textarea::placeholder, input::placeholder {
 )
 
 # ---------------------------
-# SILENT MODEL LOAD (tries common filenames)
-# ---------------------------
-MODEL = None
-VECT = None
-
-def silent_load():
-    global MODEL, VECT
-    model_files = ["mental_health_model.pkl","model.pkl","mental_health_model.joblib","model.joblib"]
-    vect_files = ["tfidf_vectorizer.pkl","tfidf.pkl","vectorizer.pkl","tfidf_vectorizer.joblib"]
-    for m in model_files:
-        if os.path.exists(m):
-            try:
-                MODEL = joblib.load(m)
-                break
-            except Exception:
-                try:
-                    with open(m,"rb") as f:
-                        MODEL = pickle.load(f)
-                        break
-                except Exception:
-                    continue
-    for v in vect_files:
-        if os.path.exists(v):
-            try:
-                VECT = joblib.load(v)
-                break
-            except Exception:
-                try:
-                    with open(v,"rb") as f:
-                        VECT = pickle.load(f)
-                        break
-                except Exception:
-                    continue
-
-silent_load()
-
-# ---------------------------
-# SAFE FALLBACK (used silently if no model)
+# MODEL LOAD (cached registry, unpickled once per process)
 # ---------------------------
-ANX_WORDS = {"panic","anxious","scared","worried","overthinking","nervous","fear","shaky"}
-DEP_WORDS = {"sad","empty","tired","hopeless","worthless","numb","alone","lost"}
-SUI_WORDS = {"suicide","kill myself","end my life","die","cant go on","no reason to live"}
-
-def fallback_predict(text):
-    t = clean(text)
-    tokens = set(t.split())
-    a = len(tokens & ANX_WORDS)
-    d = len(tokens & DEP_WORDS)
-    s = len(tokens & SUI_WORDS)
-    scores = {"Anxiety": a, "Depression": d, "Suicide": s}
-    top = max(scores, key=scores.get)
-    if sum(scores.values()) == 0:
-        return "Calm / Neutral", {"Anxiety":0.0,"Depression":0.0,"Suicide":0.0}
-    total = sum(scores.values())
-    probs = {k: round(v/total,2) for k,v in scores.items()}
-    return top, probs
-
-# ---------------------------
-# TEXT CLEANER & METRICS
-# ---------------------------
-def clean(text):
-    if not isinstance(text, str):
-        return ""
-    t = text.lower()
-    t = re.sub(r"http\S+|www\S+|https\S+", "", t)
-    t = re.sub(r"[^a-zA-Z\s']", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
-
-POS = {"good","better","calm","okay","relief","hope","safe","well","ok","fine"}
-NEG = {"sad","tired","hopeless","worthless","numb","suicide","die","hurt","alone"}
-
-def input_metrics(text):
-    t = clean(text)
-    words = t.split()
-    wc = len(words)
-    pos = sum(1 for w in words if w in POS)
-    neg = sum(1 for w in words if w in NEG)
-    polarity_raw = (pos - neg) / max(1, wc)
-    # human-friendly tone
-    if polarity_raw > 0.15:
-        tone = "Mostly positive"
-    elif polarity_raw < -0.15:
-        tone = "Mostly negative"
-    else:
-        tone = "Mixed / Neutral"
-    neg_density = round(neg / max(1, wc), 2)
-    intensity = min(wc / 120, 1.0)
-    return {"word_count": wc, "tone": tone, "neg_density": neg_density, "intensity": round(intensity,2)}
-
-# ---------------------------
-# MODEL PREDICTION (silent usage)
-# ---------------------------
-def predict_with_model(text):
-    cleaned = clean(text)
-    if MODEL is None or VECT is None:
-        return None
-    try:
-        vec = VECT.transform([cleaned])
-        if hasattr(MODEL, "predict_proba"):
-            probs_arr = MODEL.predict_proba(vec)[0]
-            classes = [str(c) for c in MODEL.classes_]
-            # map class names to our keys where possible
-            probs = {"Anxiety":0.0,"Depression":0.0,"Suicide":0.0}
-            for i,c in enumerate(classes):
-                lc = c.lower()
-                if "anx" in lc: key="Anxiety"
-                elif "depress" in lc: key="Depression"
-                elif "sui" in lc: key="Suicide"
-                else: key = c
-                probs[key] = float(probs_arr[i])
-            return probs
-        else:
-            pred = MODEL.predict(vec)[0]
-            pred = str(pred)
-            probs = {"Anxiety":0.0,"Depression":0.0,"Suicide":0.0}
-            if "anx" in pred.lower(): probs["Anxiety"]=1.0
-            elif "depress" in pred.lower(): probs["Depression"]=1.0
-            elif "sui" in pred.lower(): probs["Suicide"]=1.0
-            return probs
-    except Exception:
-        return None
-
-# ---------------------------
-# HUMAN-FRIENDLY TEXTS & ROUTINES
-# ---------------------------
-ROUTINES = {
-    "Anxiety": [
-        "Try the 4-4-6 breathing for 2 minutes (inhale 4s, hold 4s, exhale 6s).",
-        "Ground yourself: name 5 things you can see and 4 things you can touch.",
-        "Sip water slowly and soften your shoulders."
-    ],
-    "Depression": [
-        "Sit near some sunlight for 5 minutes.",
-        "Do one tiny task (fill a glass, or open a window).",
-        "Listen to a gentle song you like; try a short walk."
-    ],
-    "Suicide": [
-        "You’re not alone. Call a trusted person now, or local emergency services if in danger.",
-        "Stay with someone if you can. Ground with steady breaths.",
-        "If you feel unsafe, please reach out to emergency help right away."
-    ],
-    "Calm / Neutral": [
-        "You're okay for now — small self-care: water, fresh air, stretch."
-    ]
-}
-
-MESSAGES = {
-    "Anxiety": "Your words show tension and worry. Start with a grounding breath. You’re safe in this moment.",
-    "Depression": "There’s a heaviness in your words. Small, gentle actions can slowly help — you matter.",
-    "Suicide": "This looks like crisis language. If you are in danger or thinking about harming yourself, contact local emergency services or a crisis hotline immediately.",
-    "Calm / Neutral": "Your message seems steady. Keep checking in with small self-care."
-}
-
-# ---------------------------
-# Clinical labels + supportive messages (lists)
-# ---------------------------
-clinical_depression = [
-    ("Self-Blame", "You’re carrying weight that isn’t yours. That’s self-blaming, not truth."),
-    ("Anhedonia", "Nothing feels pleasurable lately — that’s anhedonia, not a sign you’re broken."),
-    ("Rumination", "You’re looping the same thoughts — that’s rumination, not reality."),
-    ("Cognitive Fatigue", "Your thinking feels heavy because your brain is tired — that’s cognitive fatigue."),
-    ("Hopelessness Bias", "Your mind is filtering out brighter possibilities — that’s a bias, not destiny.")
-]
-
-clinical_anxiety = [
-    ("Catastrophizing", "Your mind is jumping to worst-case scenarios — that’s fear, not fact."),
-    ("Threat Sensitivity", "Everything feels dangerous right now — that’s heightened threat sensitivity."),
-    ("Hypervigilance", "You’re scanning for danger nonstop — that’s hypervigilance, not intuition."),
-    ("Racing Thoughts", "Your thoughts are racing — that’s overload, not failure."),
-    ("Uncertainty Intolerance", "Not knowing is hard — that’s anxiety, not a personal flaw.")
-]
-
-clinical_anger = [
-    ("Emotional Flooding", "You’re overwhelmed — that’s emotional flooding, not danger."),
-    ("Frustration Overload", "Your system is overloaded; that heat is frustration, not failure."),
-    ("Cognitive Narrowing", "Anger narrows focus — that’s a reaction, not a choice."),
-    ("Boundary Trigger", "This fire often comes from a crossed boundary, not because you’re 'too much'."),
-    ("Suppressed Resentment", "This may be resentment built up from feeling unheard, not uncontrollable rage.")
-]
-
-clinical_fear = [
-    ("Freeze Response", "Your mind is freezing to protect you — not abandoning you."),
-    ("Sense of Overwhelm", "You feel swamped — that’s overwhelm, not reality collapsing."),
-    ("Safety Seeking", "You’re looking for escape routes — that’s fear, not failure."),
-    ("Future Threat Projection", "You’re imagining threats ahead — that’s projection, not prophecy."),
-    ("Emotional Shock", "Your body is stunned — that’s shock, not brokenness.")
-]
-
-clinical_positive = [
-    ("Stable Grounding", "You’re steady right now — hold this space."),
-    ("Emotional Clarity", "Your mind feels clearer — trust that clarity."),
-    ("Adaptive Thinking", "You’re responding with balance — that’s a healthy pattern."),
-    ("Healthy Regulation", "You’re regulating well — keep honoring your pace."),
-    ("Resilience Mode", "This calm is resilience showing through.")
-]
-
-clinical_labels = {
-    "Depression": clinical_depression,
-    "Anxiety": clinical_anxiety,
-    "Anger": clinical_anger,
-    "Fear / Stress": clinical_fear,
-    "Calm / Neutral": clinical_positive
-}
-
-def get_clinical_message(detected_label):
-    # Map detected_label string to clinical_labels keys
-    if not detected_label:
-        key = "Calm / Neutral"
-    else:
-        dl = detected_label.lower()
-        if "depress" in dl:
-            key = "Depression"
-        elif "anx" in dl:
-            key = "Anxiety"
-        elif "sui" in dl:
-            key = "Suicide" # no dedicated suicide list; we'll fallback
-        elif "ang" in dl or "rage" in dl:
-            key = "Anger"
-        elif "fear" in dl or "stress" in dl:
-            key = "Fear / Stress"
-        elif "calm" in dl or "neutral" in dl:
-            key = "Calm / Neutral"
-        else:
-            key = "Calm / Neutral"
-
-    # If suicide or unknown, fallback to depression/anxiety combos
-    if key == "Suicide":
-        # choose from depression or anxiety lists for supportive messaging
-        pool = clinical_depression + clinical_anxiety
-    else:
-        pool = clinical_labels.get(key, clinical_positive)
-
-    label, msg = random.choice(pool)
-    return label, msg
+# unpickling the model pulls in sklearn/scipy (~2s cold); do it on a background thread so
+# the first page paints right away. The first analysis waits for it only if it isn't done yet.
+preload_registry()
+# model calls from every session share a few worker threads; a burst of long pastes queues
+# (and past MINDFUL_INFERENCE_QUEUE / _TIMEOUT falls back) instead of slowing everyone down
+ENGINE = get_engine()
+# background hot reload: a newly published manifest is loaded, warmed up and swapped in
+start_watcher(float(os.environ.get("MINDFUL_RELOAD_INTERVAL", "10")))
+
+# optional persistent history (off unless MINDFUL_HISTORY_DB is set)
+HISTORY_DB = get_history_db()
+# saved checks belong to a random id made once per session and kept in the page's URL, so a
+# bookmark brings them back; without a valid id nothing saved is shown (there is no shared user)
+USER_ID = None
+if HISTORY_DB is not None:
+    if "history_user" not in st.session_state:
+        param = st.experimental_get_query_params().get("user", [""])[0]
+        st.session_state["history_user"] = param if is_user_id(param) else new_user_id()
+        st.experimental_set_query_params(user=st.session_state["history_user"])
+    USER_ID = st.session_state["history_user"]
 
 # ---------------------------
 # UI: Header + input
 # ---------------------------
-st.markdown("<div style='padding:10px 0'><h1 style='margin:0;color:#5b3a29'>💛 Mindful — Emotions Analyzer</h1><div class='small muted' style='margin-top:6px'>A calm, private place to check your feelings. Your words stay in this session.</div></div>", unsafe_allow_html=True)
+# privacy line: only promise "stays in this session" when nothing is written to disk
+PRIVACY_NOTE = ("Your checks are saved on this server under this page's private link, so you can see trends "
+                "over time; anyone with the link can see them." if HISTORY_DB is not None
+                else "Your words stay in this session.")
+st.markdown(f"<div style='padding:10px 0'><h1 style='margin:0;color:#5b3a29'>💛 Mindful — Emotions Analyzer</h1><div class='small muted' style='margin-top:6px'>A calm, private place to check your feelings. {PRIVACY_NOTE}</div></div>", unsafe_allow_html=True)
 st.markdown("---")
 
 st.session_state.setdefault("selected", None)
-st.session_state.setdefault("history", [])
+st.session_state.setdefault("history", SessionHistory())
 
 # Input
 st.subheader("Write what’s on your mind")
@@ -409,21 +209,54 @@ st.markdown("") # spacer
 # PROCESS INPUT HIDDENLY
 # ---------------------------
 detected = None
+long_result = None
 probs = {"Anxiety":0.0,"Depression":0.0,"Suicide":0.0}
+# normalize once per rerun; prediction, fallback and metrics all share the result
+with timed("normalize"):
+    normalized = normalize(user_text)
+with timed("lexicon"):
+    hits = lexicon_hits(normalized)
+REGISTRY = None
+tfidf_row = None
+busy = False
 if user_text.strip():
-    probs = predict_with_model(user_text)
+    with timed("registry"):
+        REGISTRY = get_registry()
+    try:
+        # the TF-IDF row comes back too (also on a cache hit): the insights card explains from it
+        result = predict_with_model(normalized, REGISTRY, predict=ENGINE.predict_many, return_row=True)
+        probs, tfidf_row = result if result is not None else (None, None)
+    except TimeoutError:
+        # engine saturated: answer from the word lists now rather than keep this session waiting
+        probs, busy = None, True
     if probs is None:
-        label, fallback_probs = fallback_predict(user_text)
+        label, fallback_probs = fallback_predict(normalized, hits)
         probs = fallback_probs
         detected = label
     else:
         detected = max(probs, key=probs.get)
+        # long entries: score sentence windows so one serious passage isn't averaged away
+        if is_long_text(normalized):
+            with timed("long_text"):
+                try:
+                    long_result = analyze_long_text(user_text, REGISTRY, predict=ENGINE.predict_many)
+                except TimeoutError:
+                    busy = True  # keep the whole-entry reading
+            if long_result is not None:
+                probs = long_result.aggregate["probs"]
+                detected = long_result.aggregate["label"]
 else:
     detected = None
+if busy:
+    st.caption("Lots of people are checking in right now, so this is a quick estimate. Try again in a moment for the full reading.")
+elif REGISTRY is not None and not REGISTRY.ready:
+    # say so instead of quietly answering from the word lists (e.g. a pickle that no longer
+    # matches the sha256 its manifest pinned)
+    st.caption(f"The model couldn't be loaded, so this is a quick word-list estimate ({'; '.join(REGISTRY.errors)}).")
 
-# compute emotion score and breakdown for storage
-emotion_score = round(max(probs.values()) if probs else 0.0, 2)
-breakdown = {k.lower(): float(v) for k, v in probs.items()}
+# compute emotion score for storage: the score of the label shown, not of the argmax
+# (a long entry's crisis window can decide the label against the overall mean)
+emotion_score = round(probs.get(detected, max(probs.values())) if probs else 0.0, 2)
 
 # clinical label + message for this detection
 clinical_label, clinical_message = get_clinical_message(detected)
@@ -435,20 +268,21 @@ insight = clinical_message
 def save_history_entry():
     if not user_text.strip():
         return
-    timestamp = pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
-    entry = {
-        "time": timestamp,
-        "user_text": user_text,
-        "detected": detected or "Calm / Neutral",
-        "emotion_score": emotion_score,
-        "breakdown": breakdown,
-        "insight_label": clinical_label,
-        "insight_message": clinical_message,
-        "routine": ROUTINES.get(detected, ROUTINES["Calm / Neutral"]),
-    }
+    history = st.session_state["history"]
     # avoid duplicate if same text is already top
-    if not st.session_state["history"] or st.session_state["history"][0]["user_text"] != user_text:
-        st.session_state["history"].insert(0, entry)
+    if not history or history[0].user_text != user_text:
+        entry = make_entry(
+            user_text,
+            detected or "Calm / Neutral",
+            emotion_score,
+            probs,
+            clinical_label,
+            clinical_message,
+        )
+        history.append(entry)
+        if USER_ID is not None:
+            HISTORY_DB.add(USER_ID, entry)
+        st.session_state.pop("export_blob", None)
 
 # ---------------------------
 # CARD CONTENTS (human phrasing)
@@ -460,9 +294,11 @@ else:
         st.warning("Type something first, then click a card.")
     else:
         # compute human metrics
-        metrics = input_metrics(user_text)
+        with timed("input_metrics"):
+            metrics = input_metrics(normalized, hits)
         # save history entry
-        save_history_entry()
+        with timed("history_save"):
+            save_history_entry()
 
         # Emotion card
         if st.session_state["selected"] == "emotion":
@@ -472,14 +308,26 @@ else:
                 f"<p class='small' style='margin-top:12px'>{MESSAGES.get(detected,'If you feel distressed, reach out to someone you trust.')}</p></div>",
                 unsafe_allow_html=True
             )
+            if long_result is not None:
+                peak = long_result.aggregate["peak"][detected]
+                st.caption(f"This is a long entry, so it was read in {long_result.aggregate['segments']} parts.")
+                if long_result.aggregate["segments"] > 1 and peak["text"]:
+                    st.write(f"The part that stood out most: _“{peak['text'][:240]}{'...' if len(peak['text'])>240 else ''}”_")
 
         # Breakdown (friendly bars + sentence)
         if st.session_state["selected"] == "breakdown":
             st.markdown("<div class='section'><h2 style='margin-bottom:6px'>How your message sounds</h2></div>", unsafe_allow_html=True)
+            import pandas as pd  # charts only; keeps pandas off the import path of a bare page load
+
             dfb = pd.DataFrame({"Emotion":["Anxiety","Depression","Suicide"], "Score":[probs.get("Anxiety",0),probs.get("Depression",0),probs.get("Suicide",0)]})
-            st.bar_chart(dfb.set_index("Emotion"))
-            top = dfb.loc[dfb["Score"].idxmax()]["Emotion"]
+            with timed("chart"):
+                st.bar_chart(dfb.set_index("Emotion"))
+            top = detected if detected in probs else dfb.loc[dfb["Score"].idxmax()]["Emotion"]
             st.write(f"Overall, this message reads most like **{top}**.")
+            if long_result is not None and long_result.aggregate["segments"] > 1:
+                st.markdown("**Part by part**")
+                with timed("chart"):
+                    st.line_chart(pd.DataFrame([s.probs for s in long_result.segments]))
             st.write(f"Emotional tone: **{metrics['tone']}** • Intensity: **{int(metrics['intensity']*100)}%**")
 
         # Insights (human-language)
@@ -487,6 +335,20 @@ else:
             st.markdown("<div class='section'><h2 style='margin-bottom:6px'>Quick insights</h2></div>", unsafe_allow_html=True)
             st.write(f"- **Word count:** {metrics['word_count']}")
             st.write(f"- **Tone:** {metrics['tone']}")
+            # words that pushed the model toward the detected feeling (empty on the fallback)
+            with timed("attribution"):
+                if tfidf_row is not None:
+                    # a gather over the row the prediction already computed: no transform, no worker
+                    top_terms = explain_text(normalized, detected, REGISTRY, row=tfidf_row)
+                else:
+                    top_terms = cached_explanation(normalized, detected, REGISTRY)
+                if top_terms is None:
+                    try:
+                        top_terms = ENGINE.call(explain_text, normalized, detected, REGISTRY)
+                    except TimeoutError:
+                        top_terms = []
+            if top_terms:
+                st.write(f"- **Words that shaped this ({detected}):** " + ", ".join(t for t, _ in top_terms))
             if metrics['neg_density'] > 0.18:
                 st.write("- **Note:** The message has several stress-related words. Consider grounding.")
             else:
@@ -513,44 +375,51 @@ else:
 st.markdown("---")
 st.markdown("**Recent checks (this session)**")
 if st.session_state["history"]:
-    for h in st.session_state["history"][:6]:
+    for h in st.session_state["history"].recent(6):
         st.markdown(f"- [{h['time']}] **{h['detected']}** — {h['user_text'][:80]}{'...' if len(h['user_text'])>80 else ''}")
 else:
-    st.markdown("_You haven't checked anything yet — everything stays in this browser session._")
-
-# ---- FULL SESSION EXPORT (DETAILED) ----
-if st.session_state["history"]:
-
-    export_text = "Mindful Session Report\n"
-    export_text += "=======================\n\n"
-
-    for i, h in enumerate(st.session_state["history"], 1):
-        export_text += f"Entry {i}\n"
-        export_text += f"Time: {h['time']}\n"
-        export_text += f"User Text: {h['user_text']}\n\n"
-
-        export_text += f"Detected Emotion: {h['detected']}\n"
-        export_text += f"Emotion Score: {h.get('emotion_score', '')}\n\n"
-
-        # breakdown (dictionary)
-        export_text += "Breakdown:\n"
-        for k, v in h.get("breakdown", {}).items():
-            export_text += f" - {k}: {v}\n"
-        export_text += "\n"
-
-        export_text += f"Insight Label: {h.get('insight_label','')}\n"
-        export_text += f"Insight Message: {h.get('insight_message','')}\n\n"
+    if HISTORY_DB is not None:
+        st.markdown("_You haven't checked anything yet in this session. Saved checks are kept on this server._")
+    else:
+        st.markdown("_You haven't checked anything yet — everything stays in this browser session._")
 
-        export_text += "Routine & Support:\n"
-        for step in h.get("routine", []):
-            export_text += f" • {step}\n"
-        export_text += "\n"
+# saved history trend (only with the persistent backend, and only this link's own checks)
+if USER_ID is not None:
+    month_ago = time.time() - 30 * 86400
+    counts = HISTORY_DB.label_counts(USER_ID, start_ts=month_ago)
+    if any(counts.values()):
+        st.markdown("**Your last 30 days (saved checks)**")
+        import pandas as pd
 
-        export_text += "----------------------------\n\n"
+        with timed("chart"):
+            st.bar_chart(pd.DataFrame({"Checks": counts}))
 
-    st.download_button(
-        label="📥 Download Full Session (Detailed)",
-        data=export_text,
-        file_name="mindful_full_session.txt",
-        mime="text/plain",
-    )
+# ---- FULL SESSION EXPORT (rendered only when asked for) ----
+if st.session_state["history"]:
+    export_fmt = st.selectbox("Export format", list(EXPORT_FORMATS), key="export_fmt")
+    if st.button("Prepare download", key="export_prepare"):
+        with timed("export"):
+            st.session_state["export_blob"] = (export_fmt,) + render_export(st.session_state["history"], export_fmt)
+
+    blob = st.session_state.get("export_blob")
+    if blob and blob[0] == export_fmt:
+        _, data, ext, mime = blob
+        st.download_button(
+            label="📥 Download Full Session (Detailed)",
+            data=data,
+            file_name=f"mindful_full_session.{ext}",
+            mime=mime,
+        )
+
+# ---- STAGE TIMINGS (only with MINDFUL_METRICS=1) ----
+if METRICS.enabled:
+    METRICS.observe("rerun", time.perf_counter() - RERUN_START)
+    METRICS.dump_every(os.environ.get(METRICS_FILE_ENV))
+    with st.expander("⏱ Stage timings (debug)"):
+        rows = METRICS.snapshot()
+        if rows:
+            import pandas as pd
+
+            st.dataframe(pd.DataFrame(rows).set_index("stage"))
+        st.caption("Inference engine: " + ", ".join(f"{k} {v}" for k, v in ENGINE.stats().items()))
+        st.caption("Process-wide, since start. Prometheus text: MINDFUL_METRICS_FILE or the inference service's GET /metrics.")
@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic_corpus import HISTORY_SIZES, TEXT_LENGTHS, make_history, make_texts  # noqa: E402
+
+# ---------------------------
+# MICRO-BENCHMARKS FOR THE APP'S HOT PATHS
+# ---------------------------
+# run:      python benchmarks/bench_hot_paths.py
+# baseline: python benchmarks/bench_hot_paths.py --save benchmarks/baseline.json
+# compare:  python benchmarks/bench_hot_paths.py --compare benchmarks/baseline.json --threshold 0.25
+# exits with status 1 when any case is slower than baseline * (1 + threshold)
+TEXTS_PER_CASE = 20
+
+
+def _measure(fn, args_list, repeat, min_time):
+    # calibrate the loop count so one repeat runs for at least min_time seconds
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            for a in args_list:
+                fn(a)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+    samples = [elapsed]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            for a in args_list:
+                fn(a)
+        samples.append(time.perf_counter() - start)
+    per_call = [s / (loops * len(args_list)) * 1e6 for s in samples]
+    return {"median_us": round(statistics.median(per_call), 3), "min_us": round(min(per_call), 3)}
+
+
+def build_cases():
+    from comfort_responses import get_clinical_message
+    from model_registry import get_registry
+    from model_utils import clean, fallback_predict, input_metrics, predict_with_model
+    from session_export import EXPORT_FORMATS, render_export
+    from term_attribution import explain_text
+
+    registry = get_registry()
+    cases = []
+    for name, n_words in TEXT_LENGTHS.items():
+        texts = make_texts(n_words, TEXTS_PER_CASE)
+        cases.append((f"clean/{name}", clean, texts))
+        cases.append((f"input_metrics/{name}", input_metrics, texts))
+        cases.append((f"fallback_predict/{name}", fallback_predict, texts))
+        if registry.ready:
+            cases.append((f"predict_with_model/{name}",
+                          lambda t: predict_with_model(t, registry, cache=None), texts))
+            cases.append((f"explain_text/{name}",
+                          lambda t: explain_text(t, "Anxiety", registry, cache=None), texts))
+            # the app's path: the TF-IDF row comes from the prediction, so only the gather is timed
+            rows = [(t, predict_with_model(t, registry, cache=None, return_row=True)[1]) for t in texts]
+            cases.append((f"explain_row/{name}",
+                          lambda p: explain_text(p[0], "Anxiety", registry, cache=None, row=p[1]), rows))
+    labels = ["Anxiety", "Depression", "Suicide", "Calm / Neutral", None]
+    cases.append(("get_clinical_message", get_clinical_message, labels))
+    for size in HISTORY_SIZES:
+        history = make_history(size)
+        for h in history:
+            h.report  # warm the per-entry fragments, as earlier exports in a session would
+        for fmt, (ext, _, _) in EXPORT_FORMATS.items():
+            cases.append((f"session_export_{ext}/{size}", lambda h, fmt=fmt: render_export(h, fmt), [history]))
+    return cases
+
+
+def run(selected=None, repeat=5, min_time=0.2):
+    results = {}
+    for name, fn, args_list in build_cases():
+        if selected and not any(s in name for s in selected):
+            continue
+        results[name] = _measure(fn, args_list, repeat, min_time)
+        print(f"{name:34s} median {results[name]['median_us']:>12.2f} us   min {results[name]['min_us']:>12.2f} us")
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = r["median_us"] / max(base["median_us"], 1e-9)
+        if ratio > 1 + threshold:
+            regressions.append((name, base["median_us"], r["median_us"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark the app's hot paths on synthetic text.")
+    p.add_argument("--save", help="write results to this JSON file")
+    p.add_argument("--compare", help="baseline JSON to compare against")
+    p.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown ratio (0.25 = 25%%)")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--min-time", type=float, default=0.2)
+    p.add_argument("--only", nargs="*", help="substrings of case names to run")
+    args = p.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    results = run(args.only, args.repeat, args.min_time)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved {len(results)} results to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before:.2f} us -> {after:.2f} us ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
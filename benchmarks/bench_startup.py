@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from startup_trace import app_imports  # noqa: E402
+
+# ---------------------------
+# COLD-START BENCHMARK (fresh interpreter per run)
+# ---------------------------
+# run:      python benchmarks/bench_startup.py --repeat 5
+# budget:   python benchmarks/bench_startup.py --budget-ms 2500 --ready-budget-ms 5000
+# baseline: python benchmarks/bench_startup.py --save benchmarks/startup.json
+# exits with status 1 when the median time to first paint (interpreter + app.py's imports)
+# exceeds --budget-ms, or the median time until the first prediction exceeds --ready-budget-ms
+PROBE = "i have not slept properly in days and i keep worrying about everything"
+
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+{imports}
+t1 = time.perf_counter()
+from model_registry import get_registry
+from model_utils import normalize, predict_with_model
+reg = get_registry()
+t2 = time.perf_counter()
+predict_with_model(normalize({probe!r}), reg)
+t3 = time.perf_counter()
+print(json.dumps({{"imports": t1 - t0, "registry": t2 - t1, "first_prediction": t3 - t2,
+                  "modules": len(sys.modules), "engine": reg.manifest.get("engine", "sklearn")}}))
+"""
+
+
+def run_once(modules, probe=PROBE):
+    code = CHILD.format(imports="\n".join(f"import {m}" for m in modules), probe=probe)
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "child failed")
+    phases = json.loads(proc.stdout.strip().splitlines()[-1])
+    # interpreter startup is whatever the child didn't measure itself
+    measured = phases["imports"] + phases["registry"] + phases["first_prediction"]
+    phases["interpreter"] = max(0.0, wall - measured)
+    phases["first_paint"] = phases["interpreter"] + phases["imports"]
+    phases["ready"] = wall
+    return phases
+
+
+def run(repeat=5, modules=None):
+    modules = modules or app_imports()
+    runs = [run_once(modules) for _ in range(repeat)]
+    phases = ["interpreter", "imports", "first_paint", "registry", "first_prediction", "ready"]
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "engine": runs[0]["engine"],
+            "modules_loaded": runs[0]["modules"],
+            "imports": modules,
+        },
+        "phases": {
+            p: {"median_ms": round(statistics.median(r[p] for r in runs) * 1000, 1),
+                "max_ms": round(max(r[p] for r in runs) * 1000, 1)}
+            for p in phases
+        },
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Measure cold start of the app's imports and model load.")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--budget-ms", type=float, help="fail if median first paint exceeds this")
+    p.add_argument("--ready-budget-ms", type=float, help="fail if median time to first prediction exceeds this")
+    p.add_argument("--save", help="write results to this JSON file")
+    args = p.parse_args(argv)
+
+    results = run(args.repeat)
+    print(f"engine {results['meta']['engine']}, {results['meta']['modules_loaded']} modules, "
+          f"{args.repeat} fresh interpreters")
+    for name, row in results["phases"].items():
+        print(f"{name:18s} median {row['median_ms']:>8.1f} ms   max {row['max_ms']:>8.1f} ms")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    over = []
+    for phase, budget in (("first_paint", args.budget_ms), ("ready", args.ready_budget_ms)):
+        median = results["phases"][phase]["median_ms"]
+        if budget is not None and median > budget:
+            over.append(f"{phase} {median:.0f} ms > budget {budget:.0f} ms")
+    for line in over:
+        print("OVER BUDGET:", line)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+import argparse
+import heapq
+import json
+import os
+import pickle
+import platform
+import random
+import subprocess
+import sys
+import time
+import warnings
+from multiprocessing import get_context
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic_corpus import TEXT_LENGTHS, make_text  # noqa: E402
+
+# ---------------------------
+# OFFLINE LOAD TEST (simulated users driving app.py through Streamlit's AppTest)
+# ---------------------------
+# run:      python benchmarks/load_test.py --sessions 8 --entries 3
+# save:     python benchmarks/load_test.py --sessions 16 --processes 2 --save benchmarks/load.json
+# compare:  python benchmarks/load_test.py --sessions 16 --processes 2 --compare benchmarks/load.json --threshold 0.25
+# exits with status 1 when p95 rerun latency is worse than baseline * (1 + threshold)
+#
+# Each simulated session opens the page, types an entry (think time grows with its length),
+# then clicks the four cards in random order with think times in between, `--entries` times.
+# AppTest patches process-wide Streamlit state, so one process can't run two scripts at once:
+# sessions in a process are interleaved by a scheduler that runs whichever is due next, so
+# they share the process's registry, caches and inference engine like real sessions do. Use
+# --processes for reruns that really overlap. Think times are divided by --speedup. Every
+# process runs one untimed warm-up session before the clock (and the RSS baseline) starts.
+#
+# Rerun latency is app.py's own "rerun" stage (MINDFUL_METRICS is switched on in the worker):
+# AppTest polls for the end of a script every 100 ms, so its round trip (reported separately
+# as apptest_roundtrip) only resolves to that step.
+CARDS = {"c1": "emotion", "c2": "breakdown", "c3": "insights", "c4": "routine"}
+TEXT_MIX = {"tweet": 0.5, "message": 0.35, "diary": 0.12, "multi_page": 0.03}
+PERCENTILES = [50, 90, 95, 99]
+
+
+def _quiet():
+    import logging
+
+    warnings.filterwarnings("ignore")
+    # app.py's label-less text_area logs a warning on every rerun; script errors still
+    # reach the report through AppTest's exception list
+    logging.getLogger("streamlit").disabled = True
+
+
+def _rerun_total_s():
+    # app.py's own "rerun" stage (script start to end); needs METRICS enabled
+    from stage_metrics import METRICS
+
+    for row in METRICS.snapshot():
+        if row["stage"] == "rerun":
+            return row["total_s"]
+    return 0.0
+
+
+def _state_bytes(at):
+    # rough size of one session's state: pickled size per key, getsizeof when it won't pickle
+    total = 0
+    for value in at.session_state.filtered_state.values():
+        try:
+            total += len(pickle.dumps(value))
+        except Exception:
+            total += sys.getsizeof(value)
+    return total
+
+
+class SimulatedSession:
+    def __init__(self, sid, entries, think_s, s_per_word, seed):
+        from streamlit.testing.v1 import AppTest
+
+        self.sid = sid
+        self.rng = random.Random(f"{seed}:{sid}")
+        self.at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+        self.think_s = think_s
+        self.s_per_word = s_per_word
+        self.actions = self._plan(entries)
+        self.state_bytes = []
+
+    def _plan(self, entries):
+        # [(action, arg, think time before it)]
+        plan = [("load", None, 0.0)]
+        kinds, weights = zip(*TEXT_MIX.items())
+        for _ in range(entries):
+            n_words = TEXT_LENGTHS[self.rng.choices(kinds, weights)[0]]
+            text = make_text(n_words, self.rng)
+            plan.append(("type", text, self.think_s + n_words * self.s_per_word))
+            for key in self.rng.sample(list(CARDS), len(CARDS)):
+                plan.append((key, None, self.rng.expovariate(1 / self.think_s) if self.think_s else 0.0))
+        return plan
+
+    def step(self, action, arg):
+        # -> (script seconds as app.py measures it, AppTest round trip seconds, errors)
+        at = self.at
+        before = _rerun_total_s()
+        start = time.perf_counter()
+        if action == "load":
+            at.run()
+        elif action == "type":
+            at.get("text_area")[0].input(arg).run()
+        else:
+            at.button(key=action).click().run()
+        roundtrip = time.perf_counter() - start
+        self.state_bytes.append(_state_bytes(at))
+        return _rerun_total_s() - before, roundtrip, len(at.exception)
+
+
+def run_sessions(session_ids, entries, think_s, s_per_word, seed, speedup):
+    # one process: interleave the given sessions; -> raw samples
+    _quiet()
+    from model_registry import _rss_bytes
+    from stage_metrics import METRICS
+
+    METRICS.enabled = True
+
+    # one untimed session first: model load, imports and first-run caches are the cold-start
+    # benchmark's business (bench_startup.py), not per-session cost
+    warm = SimulatedSession("warmup", 1, 0.0, 0.0, seed)
+    for action, arg, _ in warm.actions:
+        warm.step(action, arg)
+    del warm
+    rss_start = _rss_bytes()
+    sessions = [SimulatedSession(sid, entries, think_s / speedup, s_per_word / speedup, seed)
+                for sid in session_ids]
+    samples = []
+    t0 = time.perf_counter()
+    # (due time, session index, action position); staggered arrivals within the first think time
+    heap = [(random.Random(f"{seed}:arrive:{s.sid}").random() * think_s / speedup, i, 0)
+            for i, s in enumerate(sessions)]
+    heapq.heapify(heap)
+    while heap:
+        due, i, pos = heapq.heappop(heap)
+        now = time.perf_counter() - t0
+        if due > now:
+            time.sleep(due - now)
+        session = sessions[i]
+        action, arg, _ = session.actions[pos]
+        lag = max(0.0, time.perf_counter() - t0 - due)
+        script, roundtrip, errors = session.step(action, arg)
+        samples.append({"session": session.sid, "action": CARDS.get(action, action), "ms": script * 1000,
+                        "roundtrip_ms": roundtrip * 1000, "lag_ms": lag * 1000, "errors": errors,
+                        "words": len(arg.split()) if action == "type" else 0})
+        if pos + 1 < len(session.actions):
+            think = session.actions[pos + 1][2]
+            heapq.heappush(heap, (time.perf_counter() - t0 + think, i, pos + 1))
+    wall = time.perf_counter() - t0
+    rss_end = _rss_bytes()
+    return {
+        "samples": samples,
+        "wall_s": wall,
+        "rss_start": rss_start,
+        "rss_end": rss_end,
+        "state_bytes": {s.sid: s.state_bytes for s in sessions},
+    }
+
+
+def _run_worker(args):
+    return run_sessions(*args)
+
+
+def _percentiles(values):
+    if not values:
+        return {}
+    values = sorted(values)
+    out = {f"p{p}_ms": round(values[min(len(values) - 1, int(len(values) * p / 100))], 2) for p in PERCENTILES}
+    out["max_ms"] = round(values[-1], 2)
+    out["count"] = len(values)
+    return out
+
+
+def summarize(parts, sessions):
+    samples = [s for part in parts for s in part["samples"]]
+    wall = max(part["wall_s"] for part in parts)
+    by_action = {}
+    for s in samples:
+        by_action.setdefault(s["action"], []).append(s["ms"])
+    growth = []
+    for part in parts:
+        for sizes in part["state_bytes"].values():
+            if len(sizes) > 1:
+                growth.append(sizes[-1] - sizes[0])
+    rss_delta = sum(max(0, part["rss_end"] - part["rss_start"]) for part in parts)
+    return {
+        "reruns": len(samples),
+        "errors": sum(s["errors"] for s in samples),
+        "wall_s": round(wall, 2),
+        "throughput_reruns_per_s": round(len(samples) / wall, 2) if wall else 0.0,
+        "latency": _percentiles([s["ms"] for s in samples]),
+        # time a user waited from their click to the finished rerun: scheduling lag + rerun
+        "response": _percentiles([s["ms"] + s["lag_ms"] for s in samples]),
+        "apptest_roundtrip": _percentiles([s["roundtrip_ms"] for s in samples]),
+        "by_action": {a: _percentiles(v) for a, v in sorted(by_action.items())},
+        "memory": {
+            "session_state_growth_bytes_mean": round(sum(growth) / len(growth), 1) if growth else 0.0,
+            "session_state_growth_bytes_max": max(growth) if growth else 0,
+            "rss_delta_mb": round(rss_delta / (1024 * 1024), 2),
+            "rss_delta_mb_per_session": round(rss_delta / (1024 * 1024) / max(sessions, 1), 3),
+        },
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sessions=8, entries=3, processes=1, think_ms=2000.0, ms_per_word=300.0, speedup=10.0, seed=0):
+    ids = list(range(sessions))
+    think_s, s_per_word = think_ms / 1000, ms_per_word / 1000
+    if processes <= 1:
+        parts = [run_sessions(ids, entries, think_s, s_per_word, seed, speedup)]
+    else:
+        chunks = [ids[i::processes] for i in range(processes)]
+        # spawn: each worker gets a fresh interpreter (no forked Streamlit or thread state)
+        with get_context("spawn").Pool(processes) as pool:
+            parts = pool.map(_run_worker, [(c, entries, think_s, s_per_word, seed, speedup) for c in chunks if c])
+    import streamlit
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "streamlit": streamlit.__version__,
+            "git": _git_revision(),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "params": {"sessions": sessions, "entries": entries, "processes": processes, "think_ms": think_ms,
+                       "ms_per_word": ms_per_word, "speedup": speedup, "seed": seed},
+        },
+        "results": summarize(parts, sessions),
+    }
+
+
+def compare(results, baseline, threshold):
+    # -> [(metric, before, after, ratio)] for every metric that got worse beyond threshold
+    before, after = baseline.get("results", {}), results
+    checks = [("latency p95_ms", before.get("latency", {}).get("p95_ms"), after["latency"].get("p95_ms")),
+              ("response p95_ms", before.get("response", {}).get("p95_ms"), after["response"].get("p95_ms"))]
+    worse = []
+    for name, old, new in checks:
+        if old and new and new / old > 1 + threshold:
+            worse.append((name, old, new, new / old))
+    return worse
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Drive app.py with simulated concurrent sessions (offline).")
+    p.add_argument("--sessions", type=int, default=8)
+    p.add_argument("--entries", type=int, default=3, help="entries each session types (4 card clicks each)")
+    p.add_argument("--processes", type=int, default=1)
+    p.add_argument("--think-ms", type=float, default=2000.0, help="mean pause between clicks")
+    p.add_argument("--ms-per-word", type=float, default=300.0, help="typing time per word of an entry")
+    p.add_argument("--speedup", type=float, default=10.0, help="divide all think/typing times by this")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--save", help="write results to this JSON file")
+    p.add_argument("--compare", help="earlier results JSON to compare against")
+    p.add_argument("--threshold", type=float, default=0.25, help="allowed p95 slowdown ratio (0.25 = 25%%)")
+    args = p.parse_args(argv)
+
+    _quiet()
+    report = run(args.sessions, args.entries, args.processes, args.think_ms, args.ms_per_word, args.speedup, args.seed)
+    r = report["results"]
+    print(f"{r['reruns']} reruns from {args.sessions} sessions in {r['wall_s']}s "
+          f"({r['throughput_reruns_per_s']} reruns/s, {r['errors']} errors)")
+    for name, row in [("all", r["latency"]), ("response", r["response"]), ("roundtrip", r["apptest_roundtrip"])] + list(r["by_action"].items()):
+        print(f"{name:10s} " + "  ".join(f"{k[:-3]} {v:>8.1f} ms" for k, v in row.items() if k.endswith("_ms")))
+    m = r["memory"]
+    print(f"memory: session state +{m['session_state_growth_bytes_mean']:.0f} B/session (max "
+          f"+{m['session_state_growth_bytes_max']} B), RSS +{m['rss_delta_mb']} MB "
+          f"({m['rss_delta_mb_per_session']} MB/session)")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        base = baseline.get("results", {})
+        print(f"vs {args.compare} ({baseline.get('meta', {}).get('git')}): "
+              f"p50 {base.get('latency', {}).get('p50_ms')} -> {r['latency'].get('p50_ms')} ms, "
+              f"p95 {base.get('latency', {}).get('p95_ms')} -> {r['latency'].get('p95_ms')} ms, "
+              f"throughput {base.get('throughput_reruns_per_s')} -> {r['throughput_reruns_per_s']} reruns/s")
+        worse = compare(r, baseline, args.threshold)
+        for name, before, after, ratio in worse:
+            print(f"REGRESSION {name}: {before:.1f} ms -> {after:.1f} ms ({ratio:.2f}x)")
+        if worse:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
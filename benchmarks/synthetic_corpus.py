@@ -0,0 +1,76 @@
+import random
+
+# ---------------------------
+# DETERMINISTIC SYNTHETIC TEXT (no original CSVs needed)
+# ---------------------------
+# Same seed -> same texts on every machine and Python version (random.Random is stable).
+TEXT_LENGTHS = {
+    "tweet": 25,
+    "message": 120,
+    "diary": 600,
+    "multi_page": 3000,
+}
+
+HISTORY_SIZES = [10, 100, 500]
+
+_EMOTION_WORDS = [
+    "panic", "anxious", "scared", "worried", "overthinking", "nervous", "fear", "shaky",
+    "sad", "empty", "tired", "hopeless", "worthless", "numb", "alone", "lost",
+    "hurt", "calm", "okay", "relief", "hope", "safe", "better", "fine",
+]
+_PHRASES = ["kill myself", "end my life", "no reason to live", "can't go on", "I don't know"]
+_FILLER = [
+    "i", "feel", "today", "work", "sleep", "night", "friends", "family", "again", "really",
+    "the", "and", "it", "was", "my", "to", "of", "so", "not", "just", "like", "after",
+    "school", "morning", "phone", "mind", "thinking", "people", "week", "home",
+]
+_PUNCT = [".", ",", "!", "?", "...", ""]
+
+
+def make_text(n_words, rng):
+    words = []
+    while len(words) < n_words:
+        r = rng.random()
+        if r < 0.15:
+            words.append(rng.choice(_EMOTION_WORDS))
+        elif r < 0.18:
+            words.extend(rng.choice(_PHRASES).split())
+        else:
+            words.append(rng.choice(_FILLER))
+        if rng.random() < 0.1:
+            words[-1] += rng.choice(_PUNCT)
+        if rng.random() < 0.01:
+            words.append("https://example.com/post/" + str(rng.randint(1, 9999)))
+    words = words[:n_words]
+    words[0] = words[0].capitalize()
+    return " ".join(words)
+
+
+def make_texts(n_words, count, seed=0):
+    rng = random.Random(f"{seed}:{n_words}:{count}")
+    return [make_text(n_words, rng) for _ in range(count)]
+
+
+def make_history(size, seed=0):
+    # a SessionHistory filled the way app.py's save_history_entry() fills it
+    from comfort_responses import INSIGHTS
+    from session_history import SessionHistory, make_entry
+
+    rng = random.Random(f"history:{seed}:{size}")
+    labels = ["Anxiety", "Depression", "Suicide", "Calm / Neutral"]
+    history = SessionHistory(capacity=max(size, 1))
+    for i in range(size):
+        detected = rng.choice(labels)
+        raw = [rng.random() for _ in range(3)]
+        probs = {k: round(p / sum(raw), 4) for k, p in zip(["Anxiety", "Depression", "Suicide"], raw)}
+        insight_label, insight_message = rng.choice(INSIGHTS)
+        history.append(make_entry(
+            make_text(rng.choice([25, 120, 600]), rng),
+            detected,
+            round(max(probs.values()), 2),
+            probs,
+            insight_label,
+            insight_message,
+            ts=1735689600 + i * 3600,
+        ))
+    return history
@@ -0,0 +1,118 @@
+import random
+
+# ---------------------------
+# HUMAN-FRIENDLY TEXTS & ROUTINES
+# ---------------------------
+ROUTINES = {
+    "Anxiety": [
+        "Try the 4-4-6 breathing for 2 minutes (inhale 4s, hold 4s, exhale 6s).",
+        "Ground yourself: name 5 things you can see and 4 things you can touch.",
+        "Sip water slowly and soften your shoulders."
+    ],
+    "Depression": [
+        "Sit near some sunlight for 5 minutes.",
+        "Do one tiny task (fill a glass, or open a window).",
+        "Listen to a gentle song you like; try a short walk."
+    ],
+    "Suicide": [
+        "You’re not alone. Call a trusted person now, or local emergency services if in danger.",
+        "Stay with someone if you can. Ground with steady breaths.",
+        "If you feel unsafe, please reach out to emergency help right away."
+    ],
+    "Calm / Neutral": [
+        "You're okay for now — small self-care: water, fresh air, stretch."
+    ]
+}
+
+MESSAGES = {
+    "Anxiety": "Your words show tension and worry. Start with a grounding breath. You’re safe in this moment.",
+    "Depression": "There’s a heaviness in your words. Small, gentle actions can slowly help — you matter.",
+    "Suicide": "This looks like crisis language. If you are in danger or thinking about harming yourself, contact local emergency services or a crisis hotline immediately.",
+    "Calm / Neutral": "Your message seems steady. Keep checking in with small self-care."
+}
+
+# ---------------------------
+# Clinical labels + supportive messages (lists)
+# ---------------------------
+clinical_depression = [
+    ("Self-Blame", "You’re carrying weight that isn’t yours. That’s self-blaming, not truth."),
+    ("Anhedonia", "Nothing feels pleasurable lately — that’s anhedonia, not a sign you’re broken."),
+    ("Rumination", "You’re looping the same thoughts — that’s rumination, not reality."),
+    ("Cognitive Fatigue", "Your thinking feels heavy because your brain is tired — that’s cognitive fatigue."),
+    ("Hopelessness Bias", "Your mind is filtering out brighter possibilities — that’s a bias, not destiny.")
+]
+
+clinical_anxiety = [
+    ("Catastrophizing", "Your mind is jumping to worst-case scenarios — that’s fear, not fact."),
+    ("Threat Sensitivity", "Everything feels dangerous right now — that’s heightened threat sensitivity."),
+    ("Hypervigilance", "You’re scanning for danger nonstop — that’s hypervigilance, not intuition."),
+    ("Racing Thoughts", "Your thoughts are racing — that’s overload, not failure."),
+    ("Uncertainty Intolerance", "Not knowing is hard — that’s anxiety, not a personal flaw.")
+]
+
+clinical_anger = [
+    ("Emotional Flooding", "You’re overwhelmed — that’s emotional flooding, not danger."),
+    ("Frustration Overload", "Your system is overloaded; that heat is frustration, not failure."),
+    ("Cognitive Narrowing", "Anger narrows focus — that’s a reaction, not a choice."),
+    ("Boundary Trigger", "This fire often comes from a crossed boundary, not because you’re 'too much'."),
+    ("Suppressed Resentment", "This may be resentment built up from feeling unheard, not uncontrollable rage.")
+]
+
+clinical_fear = [
+    ("Freeze Response", "Your mind is freezing to protect you — not abandoning you."),
+    ("Sense of Overwhelm", "You feel swamped — that’s overwhelm, not reality collapsing."),
+    ("Safety Seeking", "You’re looking for escape routes — that’s fear, not failure."),
+    ("Future Threat Projection", "You’re imagining threats ahead — that’s projection, not prophecy."),
+    ("Emotional Shock", "Your body is stunned — that’s shock, not brokenness.")
+]
+
+clinical_positive = [
+    ("Stable Grounding", "You’re steady right now — hold this space."),
+    ("Emotional Clarity", "Your mind feels clearer — trust that clarity."),
+    ("Adaptive Thinking", "You’re responding with balance — that’s a healthy pattern."),
+    ("Healthy Regulation", "You’re regulating well — keep honoring your pace."),
+    ("Resilience Mode", "This calm is resilience showing through.")
+]
+
+clinical_labels = {
+    "Depression": clinical_depression,
+    "Anxiety": clinical_anxiety,
+    "Anger": clinical_anger,
+    "Fear / Stress": clinical_fear,
+    "Calm / Neutral": clinical_positive
+}
+
+# flat (label, message) table; history entries keep an index into it instead of copies
+INSIGHTS = [pair for pool in clinical_labels.values() for pair in pool]
+INSIGHT_INDEX = {pair: i for i, pair in enumerate(INSIGHTS)}
+
+def get_clinical_message(detected_label):
+    # Map detected_label string to clinical_labels keys
+    if not detected_label:
+        key = "Calm / Neutral"
+    else:
+        dl = detected_label.lower()
+        if "depress" in dl:
+            key = "Depression"
+        elif "anx" in dl:
+            key = "Anxiety"
+        elif "sui" in dl:
+            key = "Suicide" # no dedicated suicide list; we'll fallback
+        elif "ang" in dl or "rage" in dl:
+            key = "Anger"
+        elif "fear" in dl or "stress" in dl:
+            key = "Fear / Stress"
+        elif "calm" in dl or "neutral" in dl:
+            key = "Calm / Neutral"
+        else:
+            key = "Calm / Neutral"
+
+    # If suicide or unknown, fallback to depression/anxiety combos
+    if key == "Suicide":
+        # choose from depression or anxiety lists for supportive messaging
+        pool = clinical_depression + clinical_anxiety
+    else:
+        pool = clinical_labels.get(key, clinical_positive)
+
+    label, msg = random.choice(pool)
+    return label, msg
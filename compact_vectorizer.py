@@ -0,0 +1,147 @@
+import argparse
+import copy
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# ---------------------------
+# COMPACT TF-IDF VECTORIZER ARTIFACT
+# ---------------------------
+# python compact_vectorizer.py                     (manifest vectorizer -> tfidf_vectorizer.compact.pkl + parity check)
+# python compact_vectorizer.py --publish           (also point model_manifest.json at it; running apps hot-reload)
+#
+# - stop_words_ (every term pruned by max_features/min_df/max_df) is dropped: it is only
+#   there for introspection and can be far larger than the vocabulary itself
+# - idf_ is stored as float32 (transform still produces float64 rows)
+# - vocabulary_ is pickled as one sorted, newline-joined utf-8 blob instead of a dict of
+#   term -> column; the column is the term's position in the sorted blob (sklearn already
+#   numbers features alphabetically). Loading rebuilds the dict in one C-level pass, so
+#   transform-time lookups are exactly as fast as before.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+COMPACT_FILE = os.path.join(BASE_DIR, "tfidf_vectorizer.compact.pkl")
+
+
+def pack_vocabulary(vocabulary):
+    terms = sorted(vocabulary)
+    if any(vocabulary[t] != i for i, t in enumerate(terms)):
+        raise ValueError("vocabulary columns are not in sorted term order")
+    if any("\n" in t for t in terms):
+        raise ValueError("terms containing newlines cannot be packed")
+    return "\n".join(terms).encode("utf-8")
+
+
+def unpack_vocabulary(blob):
+    if not blob:
+        return {}
+    terms = blob.decode("utf-8").split("\n")
+    return dict(zip(terms, range(len(terms))))
+
+
+class CompactTfidfVectorizer(TfidfVectorizer):
+    # a TfidfVectorizer in every respect at runtime; only the pickled state differs
+    def __getstate__(self):
+        state = dict(super().__getstate__())  # may be the live __dict__
+        state.pop("stop_words_", None)
+        vocabulary = state.pop("vocabulary_", None)
+        if vocabulary is not None:
+            state["_vocabulary_blob"] = pack_vocabulary(vocabulary)
+        return state
+
+    def __setstate__(self, state):
+        blob = state.pop("_vocabulary_blob", None)
+        if blob is not None:
+            state["vocabulary_"] = unpack_vocabulary(blob)
+        super().__setstate__(state)
+
+
+def compact_vectorizer(vect):
+    # a compacted copy; the original is left untouched
+    if not isinstance(vect, TfidfVectorizer):
+        raise ValueError(f"expected a fitted TfidfVectorizer, got {type(vect).__name__}")
+    out = CompactTfidfVectorizer.__new__(CompactTfidfVectorizer)
+    out.__dict__.update(copy.deepcopy({k: v for k, v in vect.__dict__.items() if k != "stop_words_"}))
+    if out.use_idf:
+        out.idf_ = np.asarray(vect.idf_, dtype=np.float32)
+    return out
+
+
+def check_parity(model, vect, compact, texts):
+    # (max |p_original - p_compact|, number of texts whose top label changed)
+    from text_normalize import clean
+
+    cleaned = [clean(t) for t in texts]
+    expected = model.predict_proba(vect.transform(cleaned))
+    got = model.predict_proba(compact.transform(cleaned))
+    diff = float(np.abs(expected - got).max()) if len(texts) else 0.0
+    flips = int((expected.argmax(axis=1) != got.argmax(axis=1)).sum())
+    return diff, flips
+
+
+def _load_seconds(path, repeat=5):
+    from model_registry import load_artifact
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load_artifact(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Write a compact copy of the TF-IDF vectorizer and verify it.")
+    p.add_argument("--out", default=COMPACT_FILE)
+    p.add_argument("--tolerance", type=float, default=1e-6, help="max allowed probability difference")
+    p.add_argument("--publish", action="store_true", help="point model_manifest.json at the compact vectorizer")
+    p.add_argument("--model", help="sklearn model pickle (default: the manifest's)")
+    p.add_argument("--vectorizer", help="sklearn vectorizer pickle (default: the manifest's)")
+    args = p.parse_args(argv)
+
+    import joblib
+
+    # the pickle must reference this module, not __main__
+    from compact_vectorizer import compact_vectorizer as compact_copy
+    from model_registry import MANIFEST_FILE, load_artifact, publish, read_manifest, sklearn_paths
+    from numpy_engine import probe_texts
+
+    manifest = read_manifest()
+    try:
+        model_path, vect_path = sklearn_paths(model_path=args.model, vectorizer_path=args.vectorizer)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    model = load_artifact(model_path)
+    vect = load_artifact(vect_path)
+
+    compact = compact_copy(vect)
+    joblib.dump(compact, args.out)
+    reloaded = load_artifact(args.out)
+
+    before, after = os.path.getsize(vect_path), os.path.getsize(args.out)
+    print(f"wrote {args.out}: {before / 1024:.1f} KB -> {after / 1024:.1f} KB "
+          f"(dropped {len(getattr(vect, 'stop_words_', None) or ())} stop_words_ entries)")
+    print(f"load time: {_load_seconds(vect_path) * 1000:.1f} ms -> {_load_seconds(args.out) * 1000:.1f} ms")
+    print(f"pickled in-memory size: {len(pickle.dumps(vect)) / 1024:.1f} KB -> "
+          f"{len(pickle.dumps(reloaded)) / 1024:.1f} KB")
+
+    terms = sorted(reloaded.vocabulary_, key=reloaded.vocabulary_.get)
+    diff, flips = check_parity(model, vect, reloaded, probe_texts(terms))
+    print(f"max |p_original - p_compact| = {diff:.2e}, label changes = {flips}")
+    if diff > args.tolerance or flips:
+        print("parity check FAILED", file=sys.stderr)
+        return 1
+
+    if args.publish:
+        extra = {k: v for k, v in manifest.items() if k not in ("version", "model", "vectorizer", "engine", "arrays")}
+        new = publish(model_path, args.out, MANIFEST_FILE, version=f"{manifest.get('version', '0')}-compact",
+                      extra=extra)
+        print(f"published manifest version {new['version']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
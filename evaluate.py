@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from model_registry import MANIFEST_FILE, file_sha256, load_artifact, load_registry
+from preprocess import CACHE_DIR as PREPROCESS_CACHE_DIR, DATA_FILES, preprocess
+
+# ---------------------------
+# SCRIPTED EVALUATION (cached split + test matrices, one-pass metrics, JSON report)
+# ---------------------------
+# python evaluate.py --report reports/current.json
+# python evaluate.py --model cand/model.pkl --vectorizer cand/vect.pkl --compare reports/current.json
+#
+# The split is the notebook's (test_size=0.2, random_state=42, stratified) over the cached
+# preprocessing output, stored once per data hash. The transformed test matrix is stored as
+# sparse .npz per (data hash, vectorizer hash), so re-evaluating a model whose vectorizer
+# hasn't changed skips cleaning, splitting and transforming entirely.
+EVAL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "eval")
+TEST_SIZE = 0.2
+SEED = 42
+
+
+def _atomic_save_npz(path, save):
+    tmp = f"{path}.tmp.npz"
+    save(tmp)
+    os.replace(tmp, path)
+
+
+class Split:
+    # labels and indices are loaded eagerly; the cleaned texts only when a matrix has to be built
+    def __init__(self, data_key, split_dir, pre_dir, labels, train_idx, test_idx):
+        self.data_key = data_key
+        self.split_dir = split_dir
+        self.pre_dir = pre_dir
+        self.labels = labels
+        self.train_idx = train_idx
+        self.test_idx = test_idx
+        self._texts = None
+
+    def texts(self, idx):
+        if self._texts is None:
+            import pandas as pd
+
+            self._texts = pd.read_parquet(self.pre_dir, columns=["clean_text"])["clean_text"].tolist()
+        return [self._texts[i] for i in idx]
+
+
+def load_split(paths=DATA_FILES, test_size=TEST_SIZE, seed=SEED, cache_dir=EVAL_CACHE_DIR):
+    import pandas as pd
+
+    # a non-default --cache-dir holds the preprocessing output too (in its own subdirectory:
+    # both caches name their entries by the same data hash)
+    pre_cache = PREPROCESS_CACHE_DIR if cache_dir == EVAL_CACHE_DIR else os.path.join(cache_dir, "preprocess")
+    pre_dir, _ = preprocess(paths, cache_dir=pre_cache)
+    data_key = os.path.basename(pre_dir)
+    split_dir = os.path.join(cache_dir, data_key)
+    os.makedirs(split_dir, exist_ok=True)
+    labels = pd.read_parquet(pre_dir, columns=["label"])["label"].astype(str).to_numpy()
+
+    split_file = os.path.join(split_dir, f"split-{test_size}-{seed}.npz")
+    if os.path.exists(split_file):
+        with np.load(split_file) as z:
+            train_idx, test_idx = z["train_idx"], z["test_idx"]
+    else:
+        from sklearn.model_selection import train_test_split
+
+        train_idx, test_idx = train_test_split(np.arange(len(labels)), test_size=test_size,
+                                               random_state=seed, stratify=labels)
+        _atomic_save_npz(split_file, lambda p: np.savez(p, train_idx=train_idx, test_idx=test_idx))
+    return Split(data_key, split_dir, pre_dir, labels, train_idx, test_idx)
+
+
+def cached_matrix(path, build):
+    # sparse CSR matrix from path, or build() it and store it there
+    if os.path.exists(path):
+        return sp.load_npz(path).tocsr()
+    X = build()
+    if not sp.issparse(X):
+        # numpy_engine.SparseRows
+        X = sp.csr_matrix((X.vals, (X.rows, X.cols)), shape=X.shape)
+    X = X.tocsr()
+    _atomic_save_npz(path, lambda p: sp.save_npz(p, X))
+    return X
+
+
+def _for_model(model, X):
+    # NumpyLogReg takes COO triplets; sklearn models take the CSR matrix as is
+    if type(model).__module__.startswith("sklearn"):
+        return X
+    from numpy_engine import SparseRows
+
+    rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+    return SparseRows(rows, X.indices.astype(np.int64), X.data, X.shape)
+
+
+def compute_metrics(y_true, probs, classes):
+    # every metric from one confusion matrix (a single bincount) plus the probability matrix
+    classes = [str(c) for c in classes]
+    k = len(classes)
+    lookup = {c: i for i, c in enumerate(classes)}
+    true_idx = np.array([lookup.get(str(y), -1) for y in y_true])
+    known = true_idx >= 0
+    pred_idx = probs.argmax(axis=1)
+    cm = np.bincount(true_idx[known] * k + pred_idx[known], minlength=k * k).reshape(k, k)
+
+    tp = np.diag(cm).astype(float)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(support > 0, tp / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    n = int(known.sum())
+    weights = support / max(n, 1)
+    p_true = probs[np.flatnonzero(known), true_idx[known]]
+
+    def r(x):
+        return round(float(x), 6)
+
+    return {
+        "rows": n,
+        "unknown_labels": int((~known).sum()),
+        "accuracy": r(tp.sum() / max(n, 1)),
+        "log_loss": r(-np.log(np.clip(p_true, 1e-15, 1.0)).mean()) if n else None,
+        "mean_confidence": r(probs.max(axis=1).mean()) if len(probs) else None,
+        "macro": {"precision": r(precision.mean()), "recall": r(recall.mean()), "f1": r(f1.mean())},
+        "weighted": {"precision": r(precision @ weights), "recall": r(recall @ weights), "f1": r(f1 @ weights)},
+        "per_class": {
+            c: {"precision": r(precision[i]), "recall": r(recall[i]), "f1": r(f1[i]), "support": int(support[i])}
+            for i, c in enumerate(classes)
+        },
+        "confusion_matrix": {"labels": classes, "rows_true_cols_pred": cm.tolist()},
+    }
+
+
+def _candidate(manifest_path, model_path, vectorizer_path):
+    # -> (model, vectorizer, {artifact: sha256})
+    if model_path or vectorizer_path:
+        if not (model_path and vectorizer_path):
+            raise ValueError("--model and --vectorizer go together")
+        return (load_artifact(model_path), load_artifact(vectorizer_path),
+                {"model": file_sha256(model_path), "vectorizer": file_sha256(vectorizer_path)})
+    reg = load_registry(manifest_path)
+    if not reg.ready:
+        raise RuntimeError("model artifacts are not available: " + "; ".join(reg.errors))
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    hashes = {}
+    for key in ("model", "vectorizer", "arrays"):
+        entry = reg.manifest.get(key)
+        if entry:
+            hashes[key] = entry.get("sha256") or file_sha256(os.path.join(base, entry["path"]))
+    if "arrays" in hashes:
+        hashes["vectorizer"] = hashes["model"] = hashes["arrays"]
+    return reg.model, reg.vectorizer, hashes
+
+
+def evaluate(paths=DATA_FILES, manifest_path=MANIFEST_FILE, model_path=None, vectorizer_path=None,
+             test_size=TEST_SIZE, seed=SEED, cache_dir=EVAL_CACHE_DIR):
+    timings = {}
+    start = time.perf_counter()
+    model, vect, hashes = _candidate(manifest_path, model_path, vectorizer_path)
+    timings["load_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    split = load_split(paths, test_size, seed, cache_dir)
+    test_idx = split.test_idx
+    timings["split_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix_file = os.path.join(split.split_dir, f"X_test-{test_size}-{seed}-{hashes['vectorizer'][:16]}.npz")
+    cached = os.path.exists(matrix_file)
+    X_test = cached_matrix(matrix_file, lambda: vect.transform(split.texts(test_idx)))
+    timings["transform_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    probs = model.predict_proba(_for_model(model, X_test))
+    metrics = compute_metrics(split.labels[test_idx], probs, model.classes_)
+    timings["score_s"] = time.perf_counter() - start
+
+    return {
+        "data": {"key": split.data_key, "sources": [os.path.basename(p) for p in paths],
+                 "test_size": test_size, "seed": seed, "test_rows": int(len(test_idx))},
+        "artifacts": {k: v[:16] for k, v in sorted(hashes.items())},
+        "metrics": metrics,
+        # not written to the report file: it would make every diff noisy
+        "run": {"matrix_cached": cached, "timings": {k: round(v, 3) for k, v in timings.items()}},
+    }
+
+
+def _flatten(d, prefix=""):
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + "."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = v
+    return out
+
+
+def diff_reports(old, new):
+    # [(metric, old, new, delta)] for every numeric metric present in both reports
+    a, b = _flatten(old.get("metrics", {})), _flatten(new.get("metrics", {}))
+    return [(k, a[k], b[k], round(b[k] - a[k], 6)) for k in sorted(a.keys() & b.keys()) if a[k] != b[k]]
+
+
+def write_report(report, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        # sorted keys and fixed rounding keep `git diff` / `diff` of two reports readable
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Evaluate a model on the cached held-out split.")
+    p.add_argument("paths", nargs="*", default=DATA_FILES)
+    p.add_argument("--manifest", default=MANIFEST_FILE)
+    p.add_argument("--model", help="candidate model pickle (with --vectorizer) instead of the manifest's")
+    p.add_argument("--vectorizer")
+    p.add_argument("--test-size", type=float, default=TEST_SIZE)
+    p.add_argument("--seed", type=int, default=SEED)
+    p.add_argument("--cache-dir", default=EVAL_CACHE_DIR, help="split, matrix and preprocessing caches")
+    p.add_argument("--report", default="eval_report.json")
+    p.add_argument("--compare", help="earlier report to diff against")
+    args = p.parse_args(argv)
+
+    report = evaluate(args.paths, args.manifest, args.model, args.vectorizer,
+                      args.test_size, args.seed, args.cache_dir)
+    run = report.pop("run")
+    write_report(report, args.report)
+    m = report["metrics"]
+    print(f"accuracy {m['accuracy']:.4f}  macro-F1 {m['macro']['f1']:.4f}  log-loss {m['log_loss']:.4f}  "
+          f"({m['rows']} test rows, matrix {'cached' if run['matrix_cached'] else 'built'}) -> {args.report}")
+    for c, row in m["per_class"].items():
+        print(f"  {c:12s} P {row['precision']:.3f}  R {row['recall']:.3f}  F1 {row['f1']:.3f}  n={row['support']}")
+    print("  timings: " + ", ".join(f"{k} {v}s" for k, v in run["timings"].items()))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        changes = diff_reports(previous, report)
+        for name, old, new, delta in changes:
+            print(f"  {name:40s} {old:>10} -> {new:<10} ({delta:+})")
+        if not changes:
+            print("  no metric changes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
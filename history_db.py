@@ -0,0 +1,195 @@
+import atexit
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+
+from session_history import DETECTED, entry_from_texts
+
+# ---------------------------
+# OPTIONAL PERSISTENT HISTORY (SQLite, WAL mode)
+# ---------------------------
+# Off by default. Set MINDFUL_HISTORY_DB=/path/to/history.db to keep checks across
+# sessions; app.py then writes every saved check here as well as to the session.
+HISTORY_DB_ENV = "MINDFUL_HISTORY_DB"
+
+# labels and insights are stored as text, not as indexes into in-code tables: adding a label
+# or reordering comfort_responses must not change what old rows decode to.
+# PRAGMA user_version records the layout, so a later change can be detected on open.
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    user_text TEXT NOT NULL,
+    detected TEXT NOT NULL,
+    emotion_score REAL NOT NULL,
+    p_anxiety REAL NOT NULL,
+    p_depression REAL NOT NULL,
+    p_suicide REAL NOT NULL,
+    insight_label TEXT NOT NULL,
+    insight_message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_user_ts ON history(user_id, ts);
+CREATE INDEX IF NOT EXISTS idx_history_user_label_ts ON history(user_id, detected, ts);
+"""
+
+_COLUMNS = ("ts, user_text, detected, emotion_score, p_anxiety, p_depression, p_suicide, "
+            "insight_label, insight_message")
+
+# rows are keyed by a random id, never by a name or a shared default: knowing the id is what
+# lets someone read the rows, so it must be unguessable
+_USER_ID_RE = re.compile(r"[A-Za-z0-9_-]{22,64}")
+
+# strftime formats for trend buckets
+BUCKETS = {"hour": "%Y-%m-%d %H:00", "day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m"}
+
+
+def new_user_id():
+    return secrets.token_urlsafe(16)
+
+
+def is_user_id(value):
+    # True for ids new_user_id() could have made (and not for names like "alice")
+    return isinstance(value, str) and _USER_ID_RE.fullmatch(value) is not None
+
+
+def _row_to_entry(row):
+    ts, text, detected, score, pa, pd_, ps, insight_label, insight_message = row
+    return entry_from_texts(ts, text, detected, score, (pa, pd_, ps), insight_label, insight_message)
+
+
+class HistoryDB:
+    def __init__(self, path, batch_size=32, flush_interval=2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._open_schema()
+        self._lock = threading.Lock()
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def _open_schema(self):
+        conn = self._conn
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"{self.path}: history schema v{version} is newer than this app (v{SCHEMA_VERSION})")
+        conn.executescript(_SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    # ---- writes (buffered, flushed in one transaction) ----
+    def add(self, user_id, entry):
+        row = (user_id, entry.ts, entry.user_text, entry.detected, entry.emotion_score,
+               *entry.scores, entry.insight_label, entry.insight_message)
+        with self._lock:
+            self._pending.append(row)
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+            if due:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(f"INSERT INTO history (user_id, {_COLUMNS}) VALUES (?,?,?,?,?,?,?,?,?,?)", rows)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            self._pending = rows + self._pending
+            raise
+
+    def _query(self, sql, params):
+        with self._lock:
+            self._flush_locked()
+            return self._conn.execute(sql, params).fetchall()
+
+    # ---- reads (all filtering and aggregation done in SQL) ----
+    def count(self, user_id):
+        return self._query("SELECT COUNT(*) FROM history WHERE user_id = ?", (user_id,))[0][0]
+
+    def recent(self, user_id, n=6):
+        rows = self._query(
+            f"SELECT {_COLUMNS} FROM history WHERE user_id = ? ORDER BY ts DESC LIMIT ?", (user_id, n))
+        return [_row_to_entry(r) for r in rows]
+
+    def range(self, user_id, start_ts=None, end_ts=None, label=None, limit=None):
+        # newest first; start inclusive, end exclusive
+        sql = f"SELECT {_COLUMNS} FROM history WHERE user_id = ? AND ts >= ? AND ts < ?"
+        params = [user_id, start_ts if start_ts is not None else float("-inf"),
+                  end_ts if end_ts is not None else float("inf")]
+        if label is not None:
+            sql += " AND detected = ?"
+            params.append(label)
+        sql += " ORDER BY ts DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [_row_to_entry(r) for r in self._query(sql, params)]
+
+    def label_trend(self, user_id, bucket="day", start_ts=None, end_ts=None):
+        # [(bucket, label, checks, mean emotion score, mean p_anxiety, mean p_depression, mean p_suicide)]
+        fmt = BUCKETS[bucket]
+        rows = self._query(
+            "SELECT strftime(?, ts, 'unixepoch', 'localtime') AS b, detected, COUNT(*), "
+            "AVG(emotion_score), AVG(p_anxiety), AVG(p_depression), AVG(p_suicide) "
+            "FROM history WHERE user_id = ? AND ts >= ? AND ts < ? "
+            "GROUP BY b, detected ORDER BY b",
+            (fmt, user_id, start_ts if start_ts is not None else float("-inf"),
+             end_ts if end_ts is not None else float("inf")),
+        )
+        return [tuple(r) for r in rows]
+
+    def label_counts(self, user_id, start_ts=None, end_ts=None):
+        # the app calls this on every rerun, so it doesn't flush: committed rows are counted
+        # in SQL and the still-buffered ones are added from memory
+        lo = start_ts if start_ts is not None else float("-inf")
+        hi = end_ts if end_ts is not None else float("inf")
+        counts = {label: 0 for label in DETECTED}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT detected, COUNT(*) FROM history WHERE user_id = ? AND ts >= ? AND ts < ? GROUP BY detected",
+                (user_id, lo, hi),
+            ).fetchall()
+            pending = [r[3] for r in self._pending if r[0] == user_id and lo <= r[1] < hi]
+        counts.update(dict(rows))
+        for label in pending:
+            counts[label] = counts.get(label, 0) + 1
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+
+
+_DBS = {}
+_DBS_LOCK = threading.Lock()
+
+
+def get_history_db(path=None):
+    # one shared connection per database file per process; None when persistence is off
+    path = path or os.environ.get(HISTORY_DB_ENV)
+    if not path:
+        return None
+    with _DBS_LOCK:
+        db = _DBS.get(path)
+        if db is None:
+            db = _DBS[path] = HistoryDB(path)
+            atexit.register(db.flush)
+    return db
+
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from model_utils import predict_many
+from stage_metrics import METRICS
+
+# ---------------------------
+# SHARED INFERENCE ENGINE (bounded workers, backpressure, per-call timeouts)
+# ---------------------------
+# Streamlit runs every session's script on its own thread in one process. Without a bound,
+# a few sessions pasting long entries at once all run transform/predict_proba together and
+# everyone's rerun slows down. Model work goes through one engine per process instead:
+#
+#   - at most `workers` calls run at a time (the rest wait in FIFO order)
+#   - at most `max_queued` calls may wait; beyond that a call fails at once with EngineBusy
+#   - a caller waits at most `timeout` seconds (queue + run) before EngineTimeout
+#
+# Both errors are TimeoutErrors, so callers fall back with one except clause (the app shows
+# the lexicon estimate). Long entries are scored as several batch calls, so a long paste
+# takes turns with other sessions instead of holding a worker for its whole length.
+#
+#     MINDFUL_INFERENCE_WORKERS=2 MINDFUL_INFERENCE_QUEUE=32 MINDFUL_INFERENCE_TIMEOUT=10 streamlit run app.py
+WORKERS_ENV = "MINDFUL_INFERENCE_WORKERS"
+QUEUE_ENV = "MINDFUL_INFERENCE_QUEUE"
+TIMEOUT_ENV = "MINDFUL_INFERENCE_TIMEOUT"
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE = 32
+DEFAULT_TIMEOUT = 10.0
+
+
+class EngineBusy(TimeoutError):
+    # the wait queue is full; rejected at once rather than after the deadline
+    pass
+
+
+class EngineTimeout(TimeoutError):
+    pass
+
+
+class InferenceEngine:
+    def __init__(self, workers=DEFAULT_WORKERS, max_queued=DEFAULT_QUEUE, timeout=DEFAULT_TIMEOUT):
+        self.workers = max(1, int(workers))
+        self.max_queued = max(0, int(max_queued))
+        self.timeout = float(timeout)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    def submit(self, fn, *args, **kwargs):
+        # -> concurrent.futures.Future; raises EngineBusy when max_queued calls are already waiting.
+        # `queued` counts every admitted call a worker hasn't picked up yet, so a burst of submits
+        # can't all pass while in_flight still reads low; at most workers + max_queued are admitted
+        with self._lock:
+            if self.queued + self.in_flight >= self.workers + self.max_queued:
+                self.rejected += 1
+                raise EngineBusy(f"inference queue full ({self.queued} waiting)")
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        return self._pool.submit(self._run, fn, args, kwargs)
+
+    def call(self, fn, *args, timeout=None, **kwargs):
+        # run fn on a worker and wait for it; a call still queued at the deadline is cancelled,
+        # one already running finishes in the background and its result is dropped
+        start = time.perf_counter()
+        fut = self.submit(fn, *args, **kwargs)
+        try:
+            return fut.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            cancelled = fut.cancel()
+            with self._lock:
+                if cancelled:
+                    self.queued -= 1
+                self.timeouts += 1
+            raise EngineTimeout(f"inference took longer than {time.perf_counter() - start:.1f}s") from None
+        finally:
+            METRICS.observe("engine_call", time.perf_counter() - start)
+
+    def predict_many(self, texts, registry=None, return_matrix=False):
+        # model_utils.predict_many, run on the engine; same arguments and result
+        return self.call(predict_many, texts, registry, return_matrix)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queued": self.max_queued,
+                "timeout_s": self.timeout,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_engine():
+    # one engine per process, shared by every Streamlit session (and the inference service)
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = InferenceEngine(
+                    int(os.environ.get(WORKERS_ENV, DEFAULT_WORKERS)),
+                    int(os.environ.get(QUEUE_ENV, DEFAULT_QUEUE)),
+                    float(os.environ.get(TIMEOUT_ENV, DEFAULT_TIMEOUT)),
+                )
+    return _ENGINE
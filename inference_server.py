@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+from inference_engine import get_engine
+from model_registry import LABELS, get_registry, start_watcher
+from model_utils import predict_many, probs_to_dict
+from stage_metrics import METRICS
+
+# ---------------------------
+# HEADLESS INFERENCE SERVICE (asyncio, stdlib HTTP, micro-batched)
+# ---------------------------
+# python inference_server.py --port 8765 --max-batch 64 --max-wait-ms 5
+# python inference_server.py --unix /tmp/mindful.sock
+#
+# POST /predict  {"text": "..."} or {"texts": ["...", ...]}  (blank text -> "Calm / Neutral", as in the app)
+# GET  /stats    queue depth, batch-size histogram, latency, engine in-flight/queued counts
+# GET  /metrics  per-stage latency histograms, Prometheus text format (--metrics)
+# GET  /health
+
+
+class MicroBatcher:
+    # requests arriving within max_wait of the first queued one share one
+    # transform/predict_proba call (up to max_batch texts)
+    def __init__(self, max_batch=64, max_wait_ms=5.0, engine=None):
+        self.engine = engine or get_engine()
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue()
+        self.batch_sizes = Counter()
+        self.batches = 0
+        self.requests = 0
+        self.busy_s = 0.0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def predict(self, text):
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, fut))
+        return await fut
+
+    async def _collect(self):
+        items = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch:
+            # take whatever is already queued without waiting
+            try:
+                items.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+            texts = [t for t, _ in items]
+            start = time.perf_counter()
+            try:
+                # sparse transform + predict_proba on the shared engine (bounded, with a
+                # deadline); the registry is read once per batch, so a hot-reloaded model
+                # applies from the next batch on
+                result = await loop.run_in_executor(None, self.engine.call, predict_many, texts, get_registry())
+                error = None if result is not None else RuntimeError("model not loaded")
+            except Exception as e:
+                result, error = None, e
+            elapsed = time.perf_counter() - start
+            self.busy_s += elapsed
+            METRICS.observe("batch", elapsed)
+            self.batches += 1
+            self.requests += len(items)
+            self.batch_sizes[len(items)] += 1
+            for i, (_, fut) in enumerate(items):
+                if fut.done():
+                    continue
+                if error is not None:
+                    fut.set_exception(error)
+                else:
+                    probs, class_index = result
+                    fut.set_result(probs_to_dict(probs[i], class_index))
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            "model_busy_s": round(self.busy_s, 3),
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "engine": self.engine.stats(),
+        }
+
+
+def _label(probs):
+    return max(LABELS, key=lambda k: probs.get(k, 0.0))
+
+
+async def _score(batcher, text):
+    # blank input gets the app's neutral answer, not whatever the model makes of an empty row
+    if not text.strip():
+        return {"label": "Calm / Neutral", "probs": {k: 0.0 for k in LABELS}}
+    probs = await batcher.predict(text)
+    return {"label": _label(probs), "probs": probs}
+
+
+# ---------------------------
+# MINIMAL HTTP/1.1 HANDLING
+# ---------------------------
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+MAX_BODY = 1 << 20
+
+
+async def _write_json(writer, status, payload, keep_alive):
+    if isinstance(payload, str):
+        # plain-text bodies (the Prometheus exposition on /metrics)
+        body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+    else:
+        body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("ascii") + body)
+    await writer.drain()
+
+
+async def _handle_request(batcher, method, path, body):
+    if method == "GET" and path == "/health":
+        registry = get_registry()
+        return 200, {"ready": registry.ready, "version": registry.version, "errors": list(registry.errors)}
+    if method == "GET" and path == "/stats":
+        return 200, batcher.stats()
+    if method == "GET" and path == "/metrics":
+        return 200, METRICS.render_prometheus()
+    if method != "POST" or path != "/predict":
+        return 404, {"error": "not found"}
+    if not get_registry().ready:
+        return 503, {"error": "model not loaded"}
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return 400, {"error": "invalid JSON"}
+    if not isinstance(payload, dict):
+        return 400, {"error": "body must be a JSON object"}
+    if "texts" in payload:
+        texts = payload["texts"]
+        if not isinstance(texts, list):
+            return 400, {"error": "'texts' must be a list"}
+        if not all(isinstance(t, str) for t in texts):
+            return 400, {"error": "'texts' must be a list of strings"}
+        try:
+            results = await asyncio.gather(*(_score(batcher, t) for t in texts))
+        except TimeoutError as e:
+            return 503, {"error": str(e)}
+        return 200, {"results": results}
+    text = payload.get("text", "")
+    if not isinstance(text, str):
+        return 400, {"error": "'text' must be a string"}
+    try:
+        return 200, await _score(batcher, text)
+    except TimeoutError as e:
+        return 503, {"error": str(e)}
+
+
+async def handle_connection(batcher, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, path, version = request_line.decode("latin-1").split()
+            except ValueError:
+                await _write_json(writer, 400, {"error": "bad request line"}, False)
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                await _write_json(writer, 400, {"error": "bad Content-Length"}, False)
+                break
+            if length > MAX_BODY:
+                await _write_json(writer, 413, {"error": "body too large"}, False)
+                break
+            body = await reader.readexactly(length) if length else b""
+            try:
+                status, payload = await _handle_request(batcher, method, path.split("?")[0], body)
+            except Exception as e:
+                status, payload = 500, {"error": str(e)}
+            await _write_json(writer, status, payload, keep_alive)
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, unix_path=None, max_batch=64, max_wait_ms=5.0, reload_interval=10.0):
+    get_registry()
+    start_watcher(reload_interval)
+    batcher = MicroBatcher(max_batch, max_wait_ms)
+    batcher.start()
+
+    async def handler(reader, writer):
+        await handle_connection(batcher, reader, writer)
+
+    if unix_path:
+        server = await asyncio.start_unix_server(handler, path=unix_path)
+        where = unix_path
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        where = f"http://{host}:{port}"
+    print(f"serving on {where} (max_batch={max_batch}, max_wait_ms={max_wait_ms})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Micro-batching inference service for the emotion classifier.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    p.add_argument("--max-batch", type=int, default=64)
+    p.add_argument("--max-wait-ms", type=float, default=5.0)
+    p.add_argument("--reload-interval", type=float, default=10.0, help="seconds between manifest checks (0 = off)")
+    p.add_argument("--metrics", action="store_true", help="record per-stage latency histograms for GET /metrics")
+    args = p.parse_args(argv)
+    if args.metrics:
+        METRICS.enabled = True
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.max_batch, args.max_wait_ms, args.reload_interval))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
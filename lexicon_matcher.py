@@ -0,0 +1,97 @@
+import json
+from collections import deque, namedtuple
+
+from text_normalize import tokenize
+
+# ---------------------------
+# MULTI-PHRASE LEXICON MATCHER (Aho-Corasick over token sequences)
+# ---------------------------
+# All lexicons share one automaton, so a single left-to-right pass over the tokens
+# finds every phrase of every lexicon in O(len(tokens) + matches).
+#
+# counts:  occurrences per lexicon ("sad sad" -> 2)
+# weights: summed weight of the distinct phrases found per lexicon ("sad sad" -> 1.0)
+LexiconHits = namedtuple("LexiconHits", ["counts", "weights"])
+
+
+class PhraseMatcher:
+    def __init__(self, lexicons):
+        # lexicons: {name: {phrase: weight}} or {name: iterable of phrases (weight 1.0)}
+        self.names = list(lexicons)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._phrases = []  # (lexicon index, weight) per phrase id
+        for li, name in enumerate(self.names):
+            terms = lexicons[name]
+            if not isinstance(terms, dict):
+                terms = {t: 1.0 for t in terms}
+            for phrase, weight in terms.items():
+                self._add(tokenize(phrase), li, float(weight))
+        self._build()
+
+    def __len__(self):
+        return len(self._phrases)
+
+    def _add(self, tokens, lexicon, weight):
+        if not tokens:
+            return
+        state = 0
+        for tok in tokens:
+            nxt = self._goto[state].get(tok)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][tok] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(len(self._phrases))
+        self._phrases.append((lexicon, weight))
+
+    def _build(self):
+        # breadth-first failure links; each node's output also carries its fail chain's
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for tok, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and tok not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(tok, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, tokens):
+        goto, fail, out, phrases = self._goto, self._fail, self._out, self._phrases
+        counts = [0] * len(self.names)
+        seen = set()
+        state = 0
+        for tok in tokens:
+            while state and tok not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(tok, 0)
+            for pid in out[state]:
+                counts[phrases[pid][0]] += 1
+                seen.add(pid)
+        weights = [0.0] * len(self.names)
+        for pid in seen:
+            li, w = phrases[pid]
+            weights[li] += w
+        return LexiconHits(dict(zip(self.names, counts)), dict(zip(self.names, weights)))
+
+
+def load_lexicons(path):
+    # JSON file: {"suicide": {"end my life": 2.0, "die": 1.0}, "positive": ["calm", "safe"]}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {name: (dict(terms) if isinstance(terms, dict) else {t: 1.0 for t in terms})
+            for name, terms in data.items()}
+
+
+def merge_lexicons(base, extra):
+    merged = {name: (dict(terms) if isinstance(terms, dict) else {t: 1.0 for t in terms})
+              for name, terms in base.items()}
+    for name, terms in extra.items():
+        merged.setdefault(name, {}).update(terms)
+    return merged
@@ -0,0 +1,204 @@
+import argparse
+import io
+import json
+import re
+import sys
+from collections import namedtuple
+
+from model_registry import LABELS, get_registry
+from model_utils import predict_many, probs_to_dict
+from prediction_cache import PredictionCache, cache_key
+from text_normalize import tokenize
+
+# ---------------------------
+# LONG-TEXT MODE (sentence windows, batched scoring, streamed results)
+# ---------------------------
+# One TF-IDF vector over a multi-page entry averages a single alarming sentence away.
+# Long entries are cut into windows of whole sentences (never across a paragraph break),
+# windows are scored batch_size at a time with one transform per batch, and results are
+# yielded as they are ready. Only the current batch and a running aggregate are held,
+# so a file of any length streams through in bounded memory:
+#
+#     python long_text.py journal.txt              (one JSON line per segment, then the aggregate)
+#     python long_text.py journal.txt --summary    (aggregate only)
+LONG_TEXT_WORDS = 150     # entries longer than this (in tokens) use long-text mode in the app
+WINDOW_WORDS = 40         # a window closes once it holds this many words
+MAX_SENTENCE_CHARS = 2000  # text without punctuation is cut here so the buffer stays bounded
+BATCH_SIZE = 64
+CRISIS_LABEL = "Suicide"
+CRISIS_THRESHOLD = 0.5    # one window this sure of CRISIS_LABEL decides the aggregate label
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+SegmentScore = namedtuple("SegmentScore", ["index", "text", "words", "probs", "label"])
+LongTextResult = namedtuple("LongTextResult", ["segments", "aggregate"])
+
+
+def iter_sentences(lines):
+    # lines: any iterable of strings (a file object streams without reading it whole);
+    # yields sentences, with None marking a paragraph break
+    buf = ""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if buf:
+                yield buf
+                buf = ""
+            yield None
+            continue
+        buf = f"{buf} {line}" if buf else line
+        *done, buf = _SENTENCE_END.split(buf)
+        for s in done:
+            if s:
+                yield s
+        while len(buf) > MAX_SENTENCE_CHARS:
+            cut = buf.rfind(" ", 0, MAX_SENTENCE_CHARS)
+            cut = cut if cut > 0 else MAX_SENTENCE_CHARS
+            yield buf[:cut]
+            buf = buf[cut:].lstrip()
+    if buf:
+        yield buf
+
+
+def iter_windows(lines, window_words=WINDOW_WORDS):
+    # groups consecutive sentences into windows of about window_words words
+    window, n_words = [], 0
+    for sentence in iter_sentences(lines):
+        if sentence is not None:
+            window.append(sentence)
+            n_words += len(sentence.split())
+        if window and (sentence is None or n_words >= window_words):
+            yield " ".join(window), n_words
+            window, n_words = [], 0
+    if window:
+        yield " ".join(window), n_words
+
+
+def _as_lines(text):
+    return io.StringIO(text) if isinstance(text, str) else text
+
+
+def score_segments(text, registry=None, window_words=WINDOW_WORDS, batch_size=BATCH_SIZE, predict=predict_many):
+    # text: a string or an iterable of lines; yields SegmentScore in order.
+    # predict scores one batch; with the shared engine's, each batch waits its turn separately
+    reg = registry or get_registry()
+    index = 0
+    windows = iter_windows(_as_lines(text), window_words)
+    while True:
+        batch = []
+        for w in windows:
+            batch.append(w)
+            if len(batch) >= batch_size:
+                break
+        if not batch:
+            return
+        result = predict([t for t, _ in batch], reg)
+        if result is None:
+            raise RuntimeError("model artifacts are not available: " + "; ".join(reg.errors))
+        probs, class_index = result
+        for (segment, n_words), row in zip(batch, probs):
+            p = probs_to_dict(row, class_index)
+            yield SegmentScore(index, segment, n_words, p, max(p, key=p.get))
+            index += 1
+
+
+class LongTextAggregate:
+    # running summary: word-weighted mean per class, and the most confident window per class
+    def __init__(self, crisis_threshold=CRISIS_THRESHOLD):
+        self.crisis_threshold = crisis_threshold
+        self.segments = 0
+        self.words = 0
+        self.weighted = {k: 0.0 for k in LABELS}
+        self.peak = {k: (0.0, None, "") for k in LABELS}  # label -> (prob, segment index, text)
+        self.crisis_probs = None  # all class probs of the window behind peak[CRISIS_LABEL]
+        self.label_counts = {k: 0 for k in LABELS}
+
+    def add(self, seg):
+        self.segments += 1
+        self.words += seg.words
+        self.label_counts[seg.label] = self.label_counts.get(seg.label, 0) + 1
+        for k in LABELS:
+            p = seg.probs.get(k, 0.0)
+            self.weighted[k] += p * seg.words
+            if p > self.peak[k][0]:
+                self.peak[k] = (p, seg.index, seg.text)
+                if k == CRISIS_LABEL:
+                    self.crisis_probs = dict(seg.probs)
+
+    def result(self):
+        total = max(self.words, 1)
+        mean_probs = {k: round(v / total, 4) for k, v in self.weighted.items()}
+        crisis = self.peak[CRISIS_LABEL][0] >= self.crisis_threshold
+        # probs always agree with label: on a crisis it is the deciding window's reading
+        probs = {k: round(self.crisis_probs.get(k, 0.0), 4) for k in LABELS} if crisis else mean_probs
+        label = CRISIS_LABEL if crisis else max(probs, key=probs.get)
+        return {
+            "label": label,
+            "probs": probs,
+            "mean_probs": mean_probs,
+            "crisis": crisis,
+            "segments": self.segments,
+            "words": self.words,
+            "label_counts": dict(self.label_counts),
+            "peak": {k: {"prob": round(p, 4), "segment": i, "text": t} for k, (p, i, t) in self.peak.items()},
+        }
+
+
+LONG_TEXT_CACHE = PredictionCache(max_entries=64)
+
+
+def analyze_long_text(text, registry=None, window_words=WINDOW_WORDS, cache=LONG_TEXT_CACHE, predict=predict_many):
+    # all segments + aggregate for one entry held in memory (the app's case); None without a model
+    reg = registry or get_registry()
+    if not reg.ready:
+        return None
+    key = None
+    if cache is not None:
+        # raw text, not cleaned: windows depend on punctuation and paragraph breaks
+        key = cache_key(f"{window_words}\0{text}", reg.fingerprint)
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+    agg = LongTextAggregate()
+    segments = []
+    for seg in score_segments(text, reg, window_words, predict=predict):
+        agg.add(seg)
+        segments.append(seg)
+    result = LongTextResult(tuple(segments), agg.result())
+    if key is not None:
+        cache.put(key, result)
+    return result
+
+
+def is_long_text(normalized_or_text, min_words=LONG_TEXT_WORDS):
+    tokens = getattr(normalized_or_text, "tokens", None)
+    if tokens is None:
+        tokens = tokenize(normalized_or_text)
+    return len(tokens) > min_words
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Score a long entry window by window; '-' reads stdin.")
+    p.add_argument("path")
+    p.add_argument("--window-words", type=int, default=WINDOW_WORDS)
+    p.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    p.add_argument("--summary", action="store_true", help="print only the aggregate")
+    args = p.parse_args(argv)
+
+    f = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    agg = LongTextAggregate()
+    try:
+        for seg in score_segments(f, window_words=args.window_words, batch_size=args.batch_size):
+            agg.add(seg)
+            if not args.summary:
+                print(json.dumps({"segment": seg.index, "label": seg.label, "words": seg.words,
+                                  "probs": {k: round(v, 4) for k, v in seg.probs.items()},
+                                  "text": seg.text[:120]}, ensure_ascii=False), flush=True)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    print(json.dumps({"aggregate": agg.result()}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
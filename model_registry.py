@@ -0,0 +1,382 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from types import MappingProxyType
+
+# ---------------------------
+# MODEL REGISTRY (loaded once per process, shared by every session)
+# ---------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_FILE = os.path.join(BASE_DIR, "model_manifest.json")
+
+# used when the manifest file is missing, so the app still finds the shipped pickles
+DEFAULT_MANIFEST = {
+    "version": "1",
+    "model": {"path": "mental_health_model.pkl"},
+    "vectorizer": {"path": "tfidf_vectorizer.pkl"},
+}
+
+
+# canonical UI labels; model classes are mapped onto these once at load time
+LABELS = ["Anxiety", "Depression", "Suicide"]
+
+
+def canonical_label(name):
+    lc = str(name).lower()
+    if "anx" in lc:
+        return "Anxiety"
+    if "depress" in lc:
+        return "Depression"
+    if "sui" in lc:
+        return "Suicide"
+    return str(name)
+
+
+def build_class_index(model):
+    # {canonical label: column in predict_proba output}
+    if model is None or not hasattr(model, "classes_"):
+        return {}
+    return {canonical_label(c): i for i, c in enumerate(model.classes_)}
+
+
+def _rss_bytes():
+    # current resident set size; falls back to peak RSS where /proc is missing
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+        except Exception:
+            return 0
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def manifest_fingerprint(manifest):
+    # identifies one published model; the prediction cache keys on it
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def artifact_entry(path, base_dir):
+    return {
+        "path": os.path.relpath(os.path.abspath(path), base_dir),
+        "sha256": file_sha256(path),
+        "bytes": os.path.getsize(path),
+    }
+
+
+def write_manifest(manifest, path=MANIFEST_FILE):
+    # write-then-rename, so a watcher never reads a half-written manifest
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def read_manifest(path=MANIFEST_FILE):
+    if not os.path.exists(path):
+        return dict(DEFAULT_MANIFEST)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _entry_path(base, entry):
+    path = os.path.join(base, entry.get("path", ""))
+    expected = entry.get("sha256")
+    if expected and file_sha256(path) != expected:
+        # artifact replaced (or still being copied) without a matching manifest
+        raise ValueError(f"sha256 mismatch for {entry.get('path')}")
+    return path
+
+
+def load_artifact(path):
+    import joblib
+
+    try:
+        return joblib.load(path)
+    except Exception:
+        # older artifacts were written with plain pickle
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def _freeze(obj, depth=2):
+    # every session thread scores with the same objects: mark their arrays read-only so an
+    # accidental in-place write fails loudly instead of changing other sessions' results
+    for value in getattr(obj, "__dict__", {}).values():
+        flags = getattr(value, "flags", None)
+        if flags is not None and hasattr(flags, "writeable"):
+            flags.writeable = False
+        elif depth > 0 and hasattr(value, "get_params"):
+            _freeze(value, depth - 1)
+
+
+class ModelRegistry:
+    # model + vectorizer are loaded, warmed and swapped as one object, so a caller that
+    # holds a registry always scores with a matching pair. Nothing is changed after load
+    # (a reload builds a new registry), so threads share it without locking.
+    def __init__(self, model, vectorizer, version, manifest, load_ms, rss_delta, errors):
+        self.model = model
+        self.vectorizer = vectorizer
+        self.version = version
+        self.manifest = manifest
+        self.fingerprint = manifest_fingerprint(manifest)
+        self.load_ms = load_ms
+        self.rss_delta = rss_delta
+        self.errors = errors
+        self.class_index = MappingProxyType(build_class_index(model))
+        _freeze(model)
+        _freeze(vectorizer)
+
+    @property
+    def ready(self):
+        return self.model is not None and self.vectorizer is not None
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "ready": self.ready,
+            "load_ms": round(self.load_ms, 2),
+            "rss_delta_mb": round(self.rss_delta / (1024 * 1024), 2),
+            "errors": list(self.errors),
+        }
+
+
+def load_registry(manifest_path=MANIFEST_FILE):
+    manifest = read_manifest(manifest_path)
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    errors = []
+    loaded = {}
+
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    if manifest.get("engine") == "numpy":
+        # sklearn-free arrays exported by numpy_engine.py; no pickles involved
+        from numpy_engine import load_arrays
+
+        try:
+            loaded["vectorizer"], loaded["model"] = load_arrays(_entry_path(base, manifest.get("arrays") or {}))
+        except Exception as e:
+            loaded["vectorizer"] = loaded["model"] = None
+            errors.append(f"arrays: {e}")
+    else:
+        for key in ("model", "vectorizer"):
+            try:
+                loaded[key] = load_artifact(_entry_path(base, manifest.get(key) or {}))
+            except Exception as e:
+                loaded[key] = None
+                errors.append(f"{key}: {e}")
+    load_ms = (time.perf_counter() - start) * 1000
+    rss_delta = max(0, _rss_bytes() - rss_before)
+
+    return ModelRegistry(
+        loaded["model"],
+        loaded["vectorizer"],
+        str(manifest.get("version", "")),
+        manifest,
+        load_ms,
+        rss_delta,
+        errors,
+    )
+
+
+_REGISTRY = None
+_REGISTRY_PATH = MANIFEST_FILE
+_LOCK = threading.Lock()
+
+
+def get_registry(manifest_path=MANIFEST_FILE):
+    # module globals survive Streamlit reruns, so this only unpickles once per process
+    global _REGISTRY, _REGISTRY_PATH
+    if _REGISTRY is None:
+        with _LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = load_registry(manifest_path)
+                _REGISTRY_PATH = manifest_path
+    return _REGISTRY
+
+
+_PRELOAD = None
+_START_LOCK = threading.Lock()  # not _LOCK: that one is held for the whole unpickle
+
+
+def preload_registry(manifest_path=MANIFEST_FILE):
+    # start get_registry() on a daemon thread and return at once; a later get_registry()
+    # call waits on _LOCK until the load is done instead of starting a second one
+    global _PRELOAD
+    with _START_LOCK:
+        if _REGISTRY is None and _PRELOAD is None:
+            _PRELOAD = threading.Thread(target=get_registry, args=(manifest_path,), name="registry-preload",
+                                        daemon=True)
+            _PRELOAD.start()
+    return _PRELOAD
+
+
+# ---------------------------
+# HOT RELOAD (manifest watcher, warm-up, atomic swap)
+# ---------------------------
+PROBE_TEXTS = [
+    "i feel anxious and my heart is racing",
+    "everything feels empty and i am tired all the time",
+    "i do not want to be here anymore",
+    "today was calm and okay",
+]
+
+
+def warm_up(registry, probe_texts=PROBE_TEXTS):
+    # first calls pay for lazy imports and allocations; do them before users see the model
+    start = time.perf_counter()
+    registry.model.predict_proba(registry.vectorizer.transform(probe_texts))
+    return (time.perf_counter() - start) * 1000
+
+
+def reload_registry(manifest_path=None):
+    # load + warm the new pair off to the side, then swap the reference in one assignment.
+    # Returns the new registry, or None when the candidate failed and the old one stays.
+    global _REGISTRY
+    manifest_path = manifest_path or _REGISTRY_PATH
+    candidate = load_registry(manifest_path)
+    if not candidate.ready or candidate.errors:
+        return None
+    candidate.warmup_ms = warm_up(candidate)
+    with _LOCK:
+        _REGISTRY = candidate
+    return candidate
+
+
+class ArtifactWatcher(threading.Thread):
+    def __init__(self, manifest_path=None, interval=10.0, retry_after=60.0):
+        super().__init__(name="artifact-watcher", daemon=True)
+        self.manifest_path = manifest_path or _REGISTRY_PATH
+        self.interval = interval
+        self.retry_after = retry_after
+        self._failed = (None, 0.0)  # (fingerprint, monotonic time) of the last bad candidate
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self._stop_event = threading.Event()
+        self._seen = self._read_fingerprint()
+
+    def _read_fingerprint(self):
+        try:
+            return manifest_fingerprint(read_manifest(self.manifest_path))
+        except (OSError, ValueError):
+            return None
+
+    def check(self):
+        fp = self._read_fingerprint()
+        if fp is None or fp == self._seen or fp == get_registry(self.manifest_path).fingerprint:
+            self._seen = fp or self._seen
+            return False
+        failed_fp, failed_at = self._failed
+        if fp == failed_fp and time.monotonic() - failed_at < self.retry_after:
+            return False
+        try:
+            new = reload_registry(self.manifest_path)
+        except Exception as e:
+            new, self.last_error = None, str(e)
+        if new is None:
+            # keep serving the old pair; a half-copied release is retried after retry_after
+            self._failed = (fp, time.monotonic())
+            self.failures += 1
+            if self.last_error is None:
+                self.last_error = "candidate artifacts failed to load"
+            return False
+        self._seen = fp
+        self.reloads += 1
+        self.last_error = None
+        return True
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def stats(self):
+        return {"reloads": self.reloads, "failures": self.failures, "last_error": self.last_error,
+                "interval_s": self.interval, "version": get_registry(self.manifest_path).version}
+
+
+_WATCHER = None
+
+
+def start_watcher(interval=10.0, manifest_path=None):
+    # idempotent; one watcher thread per process
+    global _WATCHER
+    with _START_LOCK:
+        if _WATCHER is None and interval > 0:
+            _WATCHER = ArtifactWatcher(manifest_path, interval)
+            _WATCHER.start()
+    return _WATCHER
+
+
+def sklearn_paths(manifest_path=MANIFEST_FILE, model_path=None, vectorizer_path=None):
+    # (model pickle, vectorizer pickle) for tools that need the sklearn pair (exports, parity
+    # checks): the explicit paths, else the manifest's. A numpy-engine manifest has neither.
+    if model_path or vectorizer_path:
+        if not (model_path and vectorizer_path):
+            raise ValueError("--model and --vectorizer go together")
+        return model_path, vectorizer_path
+    manifest = read_manifest(manifest_path)
+    if not (manifest.get("model") and manifest.get("vectorizer")):
+        raise ValueError(f"{os.path.basename(manifest_path)} publishes the {manifest.get('engine', 'unknown')} engine, "
+                         "which has no sklearn pickles; pass --model and --vectorizer")
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    return (os.path.join(base, manifest["model"]["path"]), os.path.join(base, manifest["vectorizer"]["path"]))
+
+
+def publish(model_path, vectorizer_path=None, manifest_path=MANIFEST_FILE, version=None, engine=None, extra=None):
+    # record content hashes of a new artifact pair; running watchers pick it up
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    manifest = {"version": version or time.strftime("%Y%m%d-%H%M%S")}
+    if engine == "numpy":
+        manifest["engine"] = "numpy"
+        manifest["arrays"] = artifact_entry(model_path, base)
+    else:
+        manifest["model"] = artifact_entry(model_path, base)
+        manifest["vectorizer"] = artifact_entry(vectorizer_path, base)
+    if extra:
+        manifest.update(extra)
+    write_manifest(manifest, manifest_path)
+    return manifest
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Inspect the model registry or publish a new artifact pair.")
+    sub = p.add_subparsers(dest="command")
+    sub.add_parser("stats", help="load the registry and print load time / memory (default)")
+    pub = sub.add_parser("publish", help="write model_manifest.json with content hashes")
+    pub.add_argument("--model", required=True, help="model pickle, or .npz with --engine numpy")
+    pub.add_argument("--vectorizer")
+    pub.add_argument("--engine", choices=["sklearn", "numpy"], default="sklearn")
+    pub.add_argument("--version")
+    pub.add_argument("--manifest", default=MANIFEST_FILE)
+    args = p.parse_args(argv)
+
+    if args.command == "publish":
+        if args.engine == "sklearn" and not args.vectorizer:
+            p.error("--vectorizer is required for the sklearn engine")
+        print(json.dumps(publish(args.model, args.vectorizer, args.manifest, args.version, args.engine), indent=2))
+    else:
+        print(json.dumps(get_registry().stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import os
+
+import numpy as np
+
+from lexicon_matcher import PhraseMatcher, load_lexicons, merge_lexicons
+from model_registry import BASE_DIR, LABELS, get_registry
+from prediction_cache import PredictionCache, cache_key
+from stage_metrics import timed
+from text_normalize import clean, normalize
+
+# ---------------------------
+# SAFE FALLBACK (used silently if no model)
+# ---------------------------
+ANX_WORDS = {"panic","anxious","scared","worried","overthinking","nervous","fear","shaky"}
+DEP_WORDS = {"sad","empty","tired","hopeless","worthless","numb","alone","lost"}
+SUI_WORDS = {"suicide","kill myself","end my life","die","cant go on","no reason to live"}
+
+def fallback_predict(text, hits=None):
+    hits = hits or lexicon_hits(text)
+    scores = {
+        "Anxiety": hits.weights["anxiety"],
+        "Depression": hits.weights["depression"],
+        "Suicide": hits.weights["suicide"],
+    }
+    top = max(scores, key=scores.get)
+    if sum(scores.values()) == 0:
+        return "Calm / Neutral", {"Anxiety":0.0,"Depression":0.0,"Suicide":0.0}
+    total = sum(scores.values())
+    probs = {k: round(v/total,2) for k,v in scores.items()}
+    return top, probs
+
+# ---------------------------
+# TEXT METRICS
+# ---------------------------
+POS = {"good","better","calm","okay","relief","hope","safe","well","ok","fine"}
+NEG = {"sad","tired","hopeless","worthless","numb","suicide","die","hurt","alone"}
+
+# ---------------------------
+# LEXICON SCAN (one pass for every lexicon; extra weighted phrases come from lexicons.json)
+# ---------------------------
+LEXICON_FILE = os.path.join(BASE_DIR, "lexicons.json")
+
+def build_matcher(path=LEXICON_FILE):
+    lexicons = {
+        "anxiety": ANX_WORDS,
+        "depression": DEP_WORDS,
+        "suicide": SUI_WORDS,
+        "positive": POS,
+        "negative": NEG,
+    }
+    if os.path.exists(path):
+        lexicons = merge_lexicons(lexicons, load_lexicons(path))
+    return PhraseMatcher(lexicons)
+
+MATCHER = build_matcher()
+
+def lexicon_hits(text):
+    return MATCHER.scan(normalize(text).tokens)
+
+def input_metrics(text, hits=None):
+    hits = hits or lexicon_hits(text)
+    wc = len(normalize(text).tokens)
+    pos = hits.counts["positive"]
+    neg = hits.counts["negative"]
+    polarity_raw = (pos - neg) / max(1, wc)
+    # human-friendly tone
+    if polarity_raw > 0.15:
+        tone = "Mostly positive"
+    elif polarity_raw < -0.15:
+        tone = "Mostly negative"
+    else:
+        tone = "Mixed / Neutral"
+    neg_density = round(neg / max(1, wc), 2)
+    intensity = min(wc / 120, 1.0)
+    return {"word_count": wc, "tone": tone, "neg_density": neg_density, "intensity": round(intensity,2)}
+
+# ---------------------------
+# BATCH PREDICTION
+# ---------------------------
+def predict_many(texts, registry=None, return_matrix=False):
+    # one transform + one predict_proba for the whole batch; texts may be raw
+    # strings or NormalizedText results from normalize().
+    # returns (probs, class_index): probs is a dense (n, n_classes) array and
+    # class_index maps each canonical label to its column in probs.
+    # return_matrix=True adds the TF-IDF matrix, for callers that also explain the batch.
+    reg = registry or get_registry()
+    if not reg.ready:
+        return None
+    model = reg.model
+    with timed("clean"):
+        cleaned = [clean(t) for t in texts]
+    with timed("transform"):
+        vec = reg.vectorizer.transform(cleaned)
+    with timed("predict_proba"):
+        if hasattr(model, "predict_proba"):
+            probs = model.predict_proba(vec)
+        else:
+            preds = np.asarray(model.predict(vec))
+            probs = (preds[:, None] == np.asarray(model.classes_)[None, :]).astype(float)
+    if return_matrix:
+        return probs, reg.class_index, vec
+    return probs, reg.class_index
+
+
+def probs_to_dict(row, class_index):
+    probs = {k: 0.0 for k in LABELS}
+    for key, i in class_index.items():
+        probs[key] = float(row[i])
+    return probs
+
+
+# repeated texts (reruns, card clicks) skip the model; sized like the inference engine's knobs,
+# 0 = no limit on that axis:
+#     MINDFUL_CACHE_ENTRIES=4096 MINDFUL_CACHE_BYTES=16000000 streamlit run app.py
+CACHE_ENTRIES_ENV = "MINDFUL_CACHE_ENTRIES"
+CACHE_BYTES_ENV = "MINDFUL_CACHE_BYTES"
+DEFAULT_CACHE_ENTRIES = 2048
+DEFAULT_CACHE_BYTES = 0
+
+PREDICTION_CACHE = PredictionCache(
+    max_entries=int(os.environ.get(CACHE_ENTRIES_ENV, DEFAULT_CACHE_ENTRIES)) or None,
+    max_bytes=int(os.environ.get(CACHE_BYTES_ENV, DEFAULT_CACHE_BYTES)) or None,
+)
+
+
+def _row_arrays(X):
+    # (cols, vals) of a one-row scipy CSR matrix or numpy_engine.SparseRows, read-only
+    cols, vals = (X.indices, X.data) if hasattr(X, "indptr") else (X.cols, X.vals)
+    cols, vals = np.array(cols), np.array(vals)
+    cols.flags.writeable = vals.flags.writeable = False
+    return cols, vals
+
+
+def predict_with_model(text, registry=None, cache=PREDICTION_CACHE, predict=predict_many, return_row=False):
+    # reruns with unchanged text are served from the cache (pass cache=None to skip it);
+    # predict is the batch scorer to use on a miss (the app passes the shared engine's).
+    # return_row=True returns (probs, (cols, vals)): the text's TF-IDF row, cached with the
+    # probabilities so explaining the prediction later needs no second transform.
+    reg = registry or get_registry()
+    key = None
+    if cache is not None:
+        key = cache_key(clean(text), reg.fingerprint)
+        hit = cache.get(key)
+        if hit is not None:
+            probs, row = hit
+            return (dict(probs), row) if return_row else dict(probs)
+    try:
+        result = predict([text], reg, return_matrix=True)
+    except TimeoutError:
+        # engine busy or over its deadline: the caller decides how to degrade
+        raise
+    except Exception:
+        return None
+    if result is None:
+        return None
+    probs, class_index, X = result
+    with timed("remap"):
+        probs = probs_to_dict(probs[0], class_index)
+    row = _row_arrays(X)
+    if key is not None:
+        cache.put(key, (dict(probs), row))
+    return (probs, row) if return_row else probs
@@ -0,0 +1,363 @@
+import argparse
+import os
+import random
+import re
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+# ---------------------------
+# SKLEARN-FREE INFERENCE (TF-IDF + logistic regression in plain NumPy)
+# ---------------------------
+# export: python numpy_engine.py export            (pickles -> model_arrays.npz)
+# check:  python numpy_engine.py check             (parity against the pickled pair)
+# serve:  set "engine": "numpy" and "arrays": {"path": "model_arrays.npz"} in model_manifest.json
+#
+# smaller weights: python numpy_engine.py export --precision int8 --holdout "mental_health.csv"
+#   float32 stores coef/intercept/idf as float32; int8 additionally quantizes each class's
+#   coefficient row to int8 with one float32 scale per class (score = scale_k * sum x_j q_kj).
+#   The export is written only if its top label agrees with the float64 model on at least
+#   --min-agreement of the held-out rows (the notebook's split, as in evaluate.py), else
+#   nothing is replaced. float32/int8 need --holdout; synthetic probe texts only with --allow-probe.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARRAYS_FILE = os.path.join(BASE_DIR, "model_arrays.npz")
+PRECISIONS = ("float64", "float32", "int8")
+MIN_AGREEMENT = 0.995
+
+# transform() output: COO triplets, one entry per (document, term) with a non-zero weight
+SparseRows = namedtuple("SparseRows", ["rows", "cols", "vals", "shape"])
+
+
+def _pack_strings(strings):
+    # newline-joined utf-8 blob; terms never contain "\n" (token pattern is \w-based)
+    return np.frombuffer("\n".join(strings).encode("utf-8"), dtype=np.uint8)
+
+
+def _unpack_strings(arr):
+    s = arr.tobytes().decode("utf-8")
+    return s.split("\n") if s else []
+
+
+class NumpyTfidf:
+    def __init__(self, terms, idf, ngram_range=(1, 1), stop_words=(), token_pattern=r"(?u)\b\w\w+\b",
+                 lowercase=True, norm="l2", sublinear_tf=False):
+        self.terms = list(terms)
+        self.idf_ = np.asarray(idf)  # float64 or float32 as exported; rows are float64 either way
+        self.ngram_range = tuple(ngram_range)
+        self.stop_words = frozenset(stop_words)
+        self.token_pattern = token_pattern
+        self.lowercase = lowercase
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.vocabulary_ = {t: i for i, t in enumerate(self.terms)}
+        self._token_re = re.compile(token_pattern)
+
+    def get_feature_names_out(self):
+        return np.asarray(self.terms, dtype=object)
+
+    def analyze(self, doc):
+        # same steps as sklearn's word analyzer: lowercase, tokenize, drop stop words, n-grams
+        if self.lowercase:
+            doc = doc.lower()
+        tokens = [t for t in self._token_re.findall(doc) if t not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        grams = list(tokens) if min_n == 1 else []
+        n_tok = len(tokens)
+        for n in range(max(min_n, 2), min(max_n, n_tok) + 1):
+            for i in range(n_tok - n + 1):
+                grams.append(" ".join(tokens[i:i + n]))
+        return grams
+
+    def transform(self, docs):
+        vocab = self.vocabulary_
+        rows, cols, vals = [], [], []
+        n_docs = 0
+        for r, doc in enumerate(docs):
+            n_docs += 1
+            counts = {}
+            for g in self.analyze(doc):
+                j = vocab.get(g)
+                if j is not None:
+                    counts[j] = counts.get(j, 0) + 1
+            rows.extend([r] * len(counts))
+            cols.extend(counts.keys())
+            vals.extend(counts.values())
+
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        vals = np.asarray(vals, dtype=np.float64)
+        if self.sublinear_tf:
+            vals = np.log(vals) + 1
+        vals *= self.idf_[cols]
+        if self.norm == "l2":
+            norms = np.sqrt(np.bincount(rows, weights=vals * vals, minlength=n_docs))
+        elif self.norm == "l1":
+            norms = np.bincount(rows, weights=np.abs(vals), minlength=n_docs)
+        else:
+            norms = None
+        if norms is not None and len(vals):
+            vals /= norms[rows]
+        return SparseRows(rows, cols, vals, (n_docs, len(self.terms)))
+
+
+class NumpyLogReg:
+    def __init__(self, coef, intercept, classes, proba="softmax", coef_scale=None):
+        # coef_scale: per-class float scales when coef is int8-quantized, else None
+        self.coef_ = np.asarray(coef)
+        self.intercept_ = np.asarray(intercept)
+        self.classes_ = np.asarray(classes)
+        self.proba = proba
+        self.coef_scale = None if coef_scale is None else np.asarray(coef_scale, dtype=np.float64)
+
+    def float_coef(self):
+        coef = self.coef_.astype(np.float64)
+        if self.coef_scale is not None:
+            coef *= self.coef_scale[:, None]
+        return coef
+
+    def decision_function(self, X):
+        n_docs = X.shape[0]
+        scores = np.empty((n_docs, self.coef_.shape[0]), dtype=np.float64)
+        for k in range(self.coef_.shape[0]):
+            # gather from the stored dtype (int8/float32 rows stay small in cache); sums are float64
+            scores[:, k] = np.bincount(X.rows, weights=X.vals * self.coef_[k][X.cols], minlength=n_docs)
+        if self.coef_scale is not None:
+            scores *= self.coef_scale
+        return scores + self.intercept_
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if self.proba == "binary":
+            p = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1 - p, p])
+        if self.proba == "ovr":
+            p = 1.0 / (1.0 + np.exp(-scores))
+            return p / p.sum(axis=1, keepdims=True)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if self.proba == "binary":
+            return self.classes_[(scores[:, 0] > 0).astype(int)]
+        return self.classes_[scores.argmax(axis=1)]
+
+
+def _proba_mode(model):
+    if len(model.classes_) == 2:
+        return "binary"
+    if type(model).__name__ == "SGDClassifier":
+        # train.py's partial_fit models: one-vs-rest sigmoids, normalized
+        if model.loss != "log_loss":
+            raise ValueError(f"SGDClassifier(loss={model.loss!r}) probabilities are not supported")
+        return "ovr"
+    multi_class = getattr(model, "multi_class", "auto")
+    solver = getattr(model, "solver", "lbfgs")
+    if multi_class in ("ovr", "warn") or (multi_class not in ("multinomial",) and solver == "liblinear"):
+        return "ovr"
+    return "softmax"
+
+
+# ---------------------------
+# EXPORT / LOAD
+# ---------------------------
+def quantize_int8(coef):
+    # symmetric per-class quantization: q = round(w / scale), scale = max|w| / 127
+    coef = np.asarray(coef, dtype=np.float64)
+    scale = np.abs(coef).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.rint(coef / scale[:, None]), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def export_arrays(model, vect, path=ARRAYS_FILE, compressed=True, precision="float64"):
+    if vect.analyzer != "word" or vect.tokenizer is not None or vect.preprocessor is not None:
+        raise ValueError("only word analyzers with the default tokenizer can be exported")
+    if vect.norm not in ("l2", "l1", None) or not vect.use_idf:
+        raise ValueError(f"unsupported vectorizer settings: norm={vect.norm!r}, use_idf={vect.use_idf}")
+    if vect.strip_accents is not None:
+        raise ValueError("strip_accents is not supported by the NumPy engine")
+
+    terms = [None] * len(vect.vocabulary_)
+    for t, i in vect.vocabulary_.items():
+        terms[i] = t
+    stop_words = sorted(vect.get_stop_words() or ())
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {PRECISIONS}")
+    dtype = np.float64 if precision == "float64" else np.float32
+    weights = {"coef": np.asarray(model.coef_, dtype=dtype)}
+    if precision == "int8":
+        weights["coef"], weights["coef_scale"] = quantize_int8(model.coef_)
+
+    save = np.savez_compressed if compressed else np.savez
+    save(
+        path,
+        intercept=np.asarray(model.intercept_, dtype=dtype),
+        classes=_pack_strings([str(c) for c in model.classes_]),
+        proba=_pack_strings([_proba_mode(model)]),
+        terms=_pack_strings(terms),
+        idf=np.asarray(vect.idf_, dtype=dtype),
+        stop_words=_pack_strings(stop_words),
+        ngram_range=np.asarray(vect.ngram_range, dtype=np.int64),
+        token_pattern=_pack_strings([vect.token_pattern]),
+        flags=np.asarray([vect.lowercase, vect.sublinear_tf], dtype=bool),
+        norm=_pack_strings([vect.norm or ""]),
+        **weights,
+    )
+    return path
+
+
+def load_arrays(path=ARRAYS_FILE):
+    with np.load(path) as z:
+        lowercase, sublinear_tf = (bool(x) for x in z["flags"])
+        vect = NumpyTfidf(
+            _unpack_strings(z["terms"]),
+            z["idf"],
+            ngram_range=tuple(int(x) for x in z["ngram_range"]),
+            stop_words=_unpack_strings(z["stop_words"]),
+            token_pattern=_unpack_strings(z["token_pattern"])[0],
+            lowercase=lowercase,
+            norm=_unpack_strings(z["norm"])[0] or None,
+            sublinear_tf=sublinear_tf,
+        )
+        model = NumpyLogReg(z["coef"], z["intercept"], _unpack_strings(z["classes"]),
+                            proba=_unpack_strings(z["proba"])[0],
+                            coef_scale=z["coef_scale"] if "coef_scale" in z.files else None)
+    return vect, model
+
+
+# ---------------------------
+# PARITY CHECK
+# ---------------------------
+def probe_texts(vect_terms, n=500, seed=13):
+    # deterministic texts built from vocabulary terms plus filler, so most n-grams are hit
+    rng = random.Random(seed)
+    filler = ["the", "and", "i", "feel", "really", "not", "today", "can't", "very", "so"]
+    texts = ["", "   ", "I feel so anxious and scared all the time", "I want to end my life",
+             "Nothing matters anymore, I'm tired and empty", "good day, feeling calm"]
+    for _ in range(n):
+        words = [rng.choice(vect_terms) if rng.random() < 0.6 else rng.choice(filler)
+                 for _ in range(rng.randint(1, 60))]
+        texts.append(" ".join(words))
+    return texts
+
+
+def holdout_texts(paths, max_rows=20000):
+    # the notebook's held-out rows (evaluate.py's cached stratified split, test_size=0.2,
+    # random_state=42), which the shipped model never saw; capped at max_rows
+    from evaluate import load_split
+
+    split = load_split(paths)
+    idx = split.test_idx[:max_rows]
+    return split.texts(idx), split.labels[idx].tolist()
+
+
+def check_agreement(model, vect, np_vect, np_model, texts, labels=None):
+    # top-label agreement and max probability gap against the float64 pickles, plus
+    # accuracy of both when true labels are known
+    from model_registry import canonical_label
+    from text_normalize import clean
+
+    cleaned = [clean(t) for t in texts]
+    expected = model.predict_proba(vect.transform(cleaned))
+    got = np_model.predict_proba(np_vect.transform(cleaned))
+    ref = [canonical_label(c) for c in np.asarray(model.classes_)[expected.argmax(axis=1)]]
+    new = [canonical_label(c) for c in np_model.classes_[got.argmax(axis=1)]]
+    n = len(texts)
+    report = {
+        "rows": n,
+        "agreement": round(sum(a == b for a, b in zip(ref, new)) / n, 6) if n else 1.0,
+        "max_abs_diff": float(np.abs(expected - got).max()) if n else 0.0,
+    }
+    if labels is not None and n:
+        truth = [canonical_label(x) for x in labels]
+        report["accuracy_float64"] = round(sum(a == b for a, b in zip(ref, truth)) / n, 4)
+        report["accuracy_export"] = round(sum(a == b for a, b in zip(new, truth)) / n, 4)
+    return report
+
+
+def _stored_precision(np_model):
+    if np_model.coef_scale is not None:
+        return "int8"
+    return "float32" if np_model.coef_.dtype == np.float32 else "float64"
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Export / verify the NumPy inference arrays.")
+    p.add_argument("command", choices=["export", "check"])
+    p.add_argument("--out", default=ARRAYS_FILE)
+    p.add_argument("--precision", choices=PRECISIONS, default="float64")
+    p.add_argument("--tolerance", type=float, default=1e-9, help="max probability difference (float64 export)")
+    p.add_argument("--min-agreement", type=float, default=MIN_AGREEMENT,
+                   help="min top-label agreement with the float64 model (float32/int8 export)")
+    p.add_argument("--holdout", nargs="*", help="training CSVs; their held-out test split is the agreement set")
+    p.add_argument("--allow-probe", action="store_true",
+                   help="check float32/int8 against synthetic probe texts when --holdout is not given")
+    p.add_argument("--uncompressed", action="store_true")
+    p.add_argument("--model", help="sklearn model pickle (default: the manifest's)")
+    p.add_argument("--vectorizer", help="sklearn vectorizer pickle (default: the manifest's)")
+    args = p.parse_args(argv)
+
+    from model_registry import load_artifact, sklearn_paths
+
+    try:
+        model_path, vect_path = sklearn_paths(model_path=args.model, vectorizer_path=args.vectorizer)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    model = load_artifact(model_path)
+    vect = load_artifact(vect_path)
+
+    if args.command == "export" and args.precision != "float64" and not (args.holdout or args.allow_probe):
+        # a lossy export is judged on held-out rows; probe texts don't show real accuracy
+        print(f"error: --precision {args.precision} needs --holdout <training CSVs> (or --allow-probe)",
+              file=sys.stderr)
+        return 2
+
+    path = args.out
+    if args.command == "export":
+        # write next to the target and only move it into place once it passes
+        path = args.out[:-4] + ".candidate.npz" if args.out.endswith(".npz") else args.out + ".candidate.npz"
+        export_arrays(model, vect, path, compressed=not args.uncompressed, precision=args.precision)
+        print(f"wrote {path} ({os.path.getsize(path) / 1024:.1f} KB, {args.precision})")
+
+    np_vect, np_model = load_arrays(path)
+    precision = _stored_precision(np_model)
+    if precision != "float64" and not (args.holdout or args.allow_probe):
+        print(f"error: {path} is {precision}; checking it needs --holdout <training CSVs> (or --allow-probe)",
+              file=sys.stderr)
+        return 2
+    if args.holdout:
+        texts, labels = holdout_texts(args.holdout)
+        print(f"agreement set: {len(texts)} held-out rows")
+    else:
+        texts, labels = probe_texts(np_vect.terms), None
+        print("agreement set: synthetic probe texts (pass --holdout for the held-out split)")
+    report = check_agreement(model, vect, np_vect, np_model, texts, labels)
+    print(f"max |p_sklearn - p_numpy| = {report['max_abs_diff']:.2e}, top-label agreement = {report['agreement']:.4%}")
+    if "accuracy_float64" in report:
+        print(f"held-out accuracy: float64 {report['accuracy_float64']:.4f}, {precision} {report['accuracy_export']:.4f}")
+
+    if precision == "float64":
+        failed = report["max_abs_diff"] > args.tolerance
+    else:
+        failed = report["agreement"] < args.min_agreement
+    if failed:
+        print("parity check FAILED" if precision == "float64" else "agreement check FAILED", file=sys.stderr)
+        if args.command == "export":
+            os.remove(path)
+            print(f"export blocked, {args.out} left unchanged", file=sys.stderr)
+        return 1
+    if args.command == "export":
+        os.replace(path, args.out)
+        print(f"moved to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
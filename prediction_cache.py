@@ -0,0 +1,80 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+# ---------------------------
+# BOUNDED LRU PREDICTION CACHE (shared by every session in the process)
+# ---------------------------
+def cache_key(cleaned, model_version):
+    # hash of normalized text + model version; a new model never serves stale entries
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(model_version).encode("utf-8"))
+    h.update(b"\0")
+    h.update(cleaned.encode("utf-8"))
+    return h.digest()
+
+
+def _sizeof(value):
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class PredictionCache:
+    def __init__(self, max_entries=2048, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        size = _sizeof(value) + len(key)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._data and (
+                (self.max_entries and len(self._data) > self.max_entries)
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                _, (_, dropped) = self._data.popitem(last=False)
+                self._bytes -= dropped
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
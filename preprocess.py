@@ -0,0 +1,191 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from text_normalize import CLEANER_VERSION, normalize
+
+# ---------------------------
+# PARALLEL, CACHED PREPROCESSING OF THE TRAINING CORPUS
+# ---------------------------
+# python preprocess.py "mental_health.csv" "mental-health (1).csv"
+#
+# Shards the CSVs across a process pool and writes cleaned text + derived columns
+# (label, word_count, polarity) as Parquet parts under .cache/preprocess/<key>/.
+# The key hashes the source file contents, CLEANER_VERSION and PREPROCESS_VERSION, so
+# re-running with unchanged inputs returns the cached directory without doing any work.
+#
+# notebook: df = load_preprocessed(["mental_health.csv", "mental-health (1).csv"])
+DATA_FILES = ["mental_health.csv", "mental-health (1).csv"]
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "preprocess")
+PREPROCESS_VERSION = "1"
+SHARD_ROWS = 20000
+
+
+def map_labels(x):
+    x = str(x).lower().strip()
+
+    # anxiety class
+    if x in ["0", "anxiety"]:
+        return "anxiety"
+
+    # depression class
+    if x in ["1", "depression"]:
+        return "depression"
+
+    # suicide class
+    if "suicide" in x or "watch" in x:
+        return "suicide"
+
+    # fallback
+    return "anxiety"
+
+
+def cache_key(paths):
+    h = hashlib.sha256()
+    h.update(f"cleaner={CLEANER_VERSION};preprocess={PREPROCESS_VERSION}".encode("utf-8"))
+    for p in paths:
+        h.update(b"\0" + os.path.basename(p).encode("utf-8") + b"\0")
+        with open(p, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()[:24]
+
+
+def _polarity_fn():
+    # TextBlob is optional: without it the polarity column is left empty
+    try:
+        from textblob import TextBlob
+    except ImportError:
+        return None
+    return lambda text: TextBlob(text).sentiment.polarity
+
+
+def _cache_usable(done_file):
+    # a complete entry, unless it was built without TextBlob and TextBlob can be imported now
+    # (otherwise an all-NaN polarity column would be served forever)
+    if not os.path.exists(done_file):
+        return False
+    try:
+        with open(done_file, encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return info.get("polarity", True) or _polarity_fn() is None
+
+
+def process_shard(out_path, source, texts, labels):
+    polarity = _polarity_fn()
+    cleaned, counts, pols, mapped = [], [], [], []
+    for text, label in zip(texts, labels):
+        norm = normalize(text if isinstance(text, str) else str(text))
+        cleaned.append(norm.cleaned)
+        counts.append(len(norm.tokens))
+        pols.append(polarity(norm.cleaned) if polarity else float("nan"))
+        mapped.append(map_labels(label))
+    df = pd.DataFrame({
+        "text": texts,
+        "clean_text": cleaned,
+        "label": pd.Categorical(mapped, categories=["anxiety", "depression", "suicide"]),
+        "word_count": pd.array(counts, dtype="int32"),
+        "polarity": pd.array(pols, dtype="float32"),
+        "source": pd.Categorical([source] * len(texts)),
+    })
+    df.to_parquet(out_path, index=False)
+    return len(df), polarity is not None
+
+
+def _iter_shards(paths, shard_rows):
+    for p in paths:
+        for chunk in pd.read_csv(p, chunksize=shard_rows):
+            chunk = chunk.iloc[:, :2]
+            chunk.columns = ["text", "label"]
+            chunk = chunk.dropna(subset=["text", "label"])
+            yield os.path.basename(p), chunk["text"].tolist(), chunk["label"].tolist()
+
+
+def preprocess(paths, cache_dir=CACHE_DIR, workers=None, shard_rows=SHARD_ROWS, force=False):
+    key = cache_key(paths)
+    out_dir = os.path.join(cache_dir, key)
+    done_file = os.path.join(out_dir, "_SUCCESS.json")
+    if not force and _cache_usable(done_file):
+        return out_dir, True
+
+    # per-process tmp dir: concurrent runs (evaluate + sweep) must not delete each other's parts
+    tmp_dir = f"{out_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    rows = 0
+    has_polarity = True
+
+    # bounded number of shards in flight keeps the parent's memory flat
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i, (source, texts, labels) in enumerate(_iter_shards(paths, shard_rows)):
+            part = os.path.join(tmp_dir, f"part-{i:05d}.parquet")
+            pending.append(pool.submit(process_shard, part, source, texts, labels))
+            while len(pending) >= workers * 2:
+                n, pol = pending.popleft().result()
+                rows += n
+                has_polarity &= pol
+        while pending:
+            n, pol = pending.popleft().result()
+            rows += n
+            has_polarity &= pol
+
+    with open(os.path.join(tmp_dir, "_SUCCESS.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "key": key,
+            "sources": [os.path.basename(p) for p in paths],
+            "cleaner_version": CLEANER_VERSION,
+            "preprocess_version": PREPROCESS_VERSION,
+            "rows": rows,
+            "polarity": has_polarity,
+            "seconds": round(time.perf_counter() - start, 2),
+        }, f, indent=2)
+    # publish atomically so a crashed run is never mistaken for a complete cache
+    shutil.rmtree(out_dir, ignore_errors=True)
+    try:
+        os.replace(tmp_dir, out_dir)
+    except OSError:
+        # a concurrent run published the same key between the rmtree and the rename
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(done_file):
+            raise
+    return out_dir, False
+
+
+def load_preprocessed(paths=DATA_FILES, columns=None, **kwargs):
+    out_dir, _ = preprocess(paths, **kwargs)
+    return pd.read_parquet(out_dir, columns=columns)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Clean and derive training columns in parallel, cached by content hash.")
+    p.add_argument("paths", nargs="*", default=DATA_FILES)
+    p.add_argument("--cache-dir", default=CACHE_DIR)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--shard-rows", type=int, default=SHARD_ROWS)
+    p.add_argument("--force", action="store_true", help="ignore an existing cache entry")
+    args = p.parse_args(argv)
+
+    start = time.perf_counter()
+    out_dir, cached = preprocess(args.paths, args.cache_dir, args.workers, args.shard_rows, args.force)
+    with open(os.path.join(out_dir, "_SUCCESS.json"), encoding="utf-8") as f:
+        info = json.load(f)
+    state = "cache hit" if cached else "built"
+    print(f"{state}: {info['rows']} rows in {out_dir} ({time.perf_counter() - start:.2f}s)")
+    if not info["polarity"]:
+        print("note: textblob is not installed, polarity column is empty")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from model_registry import LABELS, get_registry
+from model_utils import predict_many
+from term_attribution import explain_matrix
+
+# ---------------------------
+# BULK SCORING CLI
+# usage: python score_corpus.py input.csv output.csv --text-column text --workers 4
+# audit: add --explain 5 for a pred_top_terms column (n-grams that pushed each row to its label)
+# ---------------------------
+DEFAULT_CHUNK = 5000
+# every added column starts with this, so an input's own "label" (the training CSVs have one)
+# is kept next to the prediction instead of being overwritten
+OUT_PREFIX = "pred_"
+
+
+def output_columns(label_names=LABELS, explain=False):
+    return ([OUT_PREFIX + "label"] + [OUT_PREFIX + "p_" + n.lower() for n in label_names]
+            + ([OUT_PREFIX + "top_terms"] if explain else []))
+
+
+def _check_collisions(row, out_cols, where):
+    taken = [c for c in out_cols if c in row]
+    if taken:
+        raise ValueError(f"{where}: input already has output column(s) {', '.join(taken)}")
+
+
+def _detect_format(path, fmt):
+    if fmt:
+        return fmt
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def read_chunks(path, fmt, chunk_size):
+    # yields (fieldnames, rows) with at most chunk_size rows, never the whole file
+    csv.field_size_limit(sys.maxsize)
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            fieldnames = list(reader.fieldnames or [])
+            rows = (row for row in reader)
+        else:
+            fieldnames = None
+            rows = (json.loads(line) for line in f if line.strip())
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield fieldnames, chunk
+                chunk = []
+        if chunk:
+            yield fieldnames, chunk
+
+
+def chunk_texts(rows, text_column, start=0):
+    # the text column of each row; a missing column or a non-string value is an error
+    # rather than silently scoring "" (start: index of rows[0] in the file, for messages)
+    texts = []
+    for i, row in enumerate(rows):
+        value = row.get(text_column) if isinstance(row, dict) else None
+        if not isinstance(value, str):
+            if not isinstance(row, dict) or text_column not in row:
+                raise ValueError(f"row {start + i + 1}: no {text_column!r} field")
+            raise ValueError(f"row {start + i + 1}: {text_column!r} is {type(value).__name__}, not text")
+        texts.append(value)
+    return texts
+
+
+def _check_column(fieldnames, rows, text_column, out_cols=()):
+    # fail before any output is written when the column doesn't exist at all, or when an
+    # output column would overwrite an input one
+    known = fieldnames if fieldnames is not None else (list(rows[0]) if rows and isinstance(rows[0], dict) else [])
+    if text_column not in known:
+        raise ValueError(f"text column {text_column!r} not found (columns: {', '.join(map(str, known)) or 'none'})")
+    _check_collisions(known, out_cols, "header" if fieldnames is not None else "row 1")
+
+
+def _init_worker():
+    # each worker process loads the registry once
+    get_registry()
+
+
+def score_chunk(texts, explain_k=0):
+    reg = get_registry()
+    result = predict_many(texts, reg, return_matrix=True)
+    if result is None:
+        raise RuntimeError("model artifacts are not available: " + "; ".join(reg.errors))
+    probs, class_index, X = result
+    names = list(class_index)
+    cols = [class_index[n] for n in names]
+    top = probs[:, cols].argmax(axis=1)
+    labels = [names[i] for i in top]
+    terms = None
+    if explain_k:
+        # the matrix and labels just computed: no second transform/predict_proba
+        explained = explain_matrix(X, labels, reg, explain_k) or [[]] * len(texts)
+        terms = ["; ".join(f"{t}:{w}" for t, w in row) for row in explained]
+    return labels, {n: probs[:, c].round(4).tolist() for n, c in zip(names, cols)}, terms
+
+
+class _Writer:
+    def __init__(self, f, fmt):
+        self.f = f
+        self.fmt = fmt
+        self.csv = None
+
+    def write(self, fieldnames, rows, labels, probs, terms=None, start=0):
+        label_col, *prob_cols = output_columns(probs)
+        terms_col = OUT_PREFIX + "top_terms"
+        if self.fmt == "csv" and self.csv is None:
+            header = list(fieldnames or rows[0].keys()) + [label_col] + prob_cols + ([terms_col] if terms else [])
+            self.csv = csv.DictWriter(self.f, fieldnames=header, extrasaction="ignore")
+            self.csv.writeheader()
+        for i, row in enumerate(rows):
+            if fieldnames is None:
+                # JSONL objects can each have their own keys
+                _check_collisions(row, [label_col, *prob_cols, terms_col], f"row {start + i + 1}")
+            row[label_col] = labels[i]
+            for n, col in zip(probs, prob_cols):
+                row[col] = probs[n][i]
+            if terms:
+                row[terms_col] = terms[i]
+            if self.fmt == "csv":
+                self.csv.writerow(row)
+            else:
+                self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.f.flush()
+
+
+def score_file(input_path, output_path, text_column="text", chunk_size=DEFAULT_CHUNK,
+               workers=None, in_format=None, out_format=None, explain_k=0):
+    in_format = _detect_format(input_path, in_format)
+    out_format = _detect_format(output_path, out_format)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    max_pending = max(2, workers * 2)
+    total = 0
+
+    chunks = read_chunks(input_path, in_format, chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        open(output_path, "w").close()
+        return 0
+    _check_column(first[0], first[1], text_column, output_columns(explain=bool(explain_k)))
+    chunks = itertools.chain([first], chunks)
+
+    with open(output_path, "w", newline="", encoding="utf-8") as out:
+        writer = _Writer(out, out_format)
+
+        if workers <= 1:
+            for fieldnames, rows in chunks:
+                writer.write(fieldnames, rows, *score_chunk(chunk_texts(rows, text_column, total), explain_k),
+                             start=total)
+                total += len(rows)
+            return total
+
+        # bounded queue of in-flight chunks keeps memory flat and output in input order
+        pending = deque()
+        read = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for fieldnames, rows in chunks:
+                texts = chunk_texts(rows, text_column, read)
+                read += len(rows)
+                pending.append((fieldnames, rows, pool.submit(score_chunk, texts, explain_k)))
+                if len(pending) >= max_pending:
+                    fn, done_rows, fut = pending.popleft()
+                    writer.write(fn, done_rows, *fut.result(), start=total)
+                    total += len(done_rows)
+            while pending:
+                fn, done_rows, fut = pending.popleft()
+                writer.write(fn, done_rows, *fut.result(), start=total)
+                total += len(done_rows)
+    return total
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Score a CSV/JSONL corpus with the emotion classifier.")
+    p.add_argument("input")
+    p.add_argument("output")
+    p.add_argument("--text-column", default="text")
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK)
+    p.add_argument("--workers", type=int, default=None, help="process count (default: all cores, 1 = in-process)")
+    p.add_argument("--in-format", choices=["csv", "jsonl"], default=None)
+    p.add_argument("--out-format", choices=["csv", "jsonl"], default=None)
+    p.add_argument("--explain", type=int, default=0, metavar="K", help="add the top K contributing terms per row")
+    args = p.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        n = score_file(args.input, args.output, args.text_column, args.chunk_size,
+                       args.workers, args.in_format, args.out_format, args.explain)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - start
+    print(f"scored {n} rows in {elapsed:.1f}s ({n / max(elapsed, 1e-9):.0f} rows/s) -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+
+# ---------------------------
+# SESSION EXPORT (rendered only when a download is requested)
+# ---------------------------
+# Each history entry renders its text fragment ("report") with entry_report() the first
+# time it is exported and keeps it for later exports; the full report is a single join
+# over those fragments, streamed in order, instead of re-concatenating the whole history.
+REPORT_HEADER = "Mindful Session Report\n=======================\n\n"
+CSV_COLUMNS = ["time", "detected", "emotion_score", "anxiety", "depression", "suicide",
+               "insight_label", "insight_message", "routine", "user_text"]
+
+
+def entry_report(h):
+    parts = [
+        f"Time: {h['time']}\n",
+        f"User Text: {h['user_text']}\n\n",
+        f"Detected Emotion: {h['detected']}\n",
+        f"Emotion Score: {h.get('emotion_score', '')}\n\n",
+        "Breakdown:\n",
+    ]
+    parts.extend(f" - {k}: {v}\n" for k, v in h.get("breakdown", {}).items())
+    parts.append("\n")
+    parts.append(f"Insight Label: {h.get('insight_label','')}\n")
+    parts.append(f"Insight Message: {h.get('insight_message','')}\n\n")
+    parts.append("Routine & Support:\n")
+    parts.extend(f" • {step}\n" for step in h.get("routine", []))
+    parts.append("\n----------------------------\n\n")
+    return "".join(parts)
+
+
+def iter_text(history):
+    yield REPORT_HEADER
+    for i, h in enumerate(history, 1):
+        yield f"Entry {i}\n"
+        yield h.get("report") or entry_report(h)
+
+
+def iter_jsonl(history):
+    for h in history:
+        record = {k: h.get(k) for k in ("time", "user_text", "detected", "emotion_score", "breakdown",
+                                        "insight_label", "insight_message", "routine")}
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def iter_csv(history):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_COLUMNS)
+    for h in history:
+        b = h.get("breakdown", {})
+        writer.writerow([
+            h.get("time"), h.get("detected"), h.get("emotion_score"),
+            b.get("anxiety"), b.get("depression"), b.get("suicide"),
+            h.get("insight_label"), h.get("insight_message"),
+            " | ".join(h.get("routine", [])), h.get("user_text"),
+        ])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+
+
+# label -> (file extension, mime type, streaming renderer)
+EXPORT_FORMATS = {
+    "Detailed report (.txt)": ("txt", "text/plain", iter_text),
+    "JSON Lines (.jsonl)": ("jsonl", "application/x-ndjson", iter_jsonl),
+    "Spreadsheet (.csv)": ("csv", "text/csv", iter_csv),
+}
+
+
+def render_export(history, fmt):
+    ext, mime, renderer = EXPORT_FORMATS[fmt]
+    return "".join(renderer(history)).encode("utf-8"), ext, mime
+
+
+def build_export_text(history):
+    return "".join(iter_text(history))
@@ -0,0 +1,158 @@
+import time
+
+from comfort_responses import INSIGHT_INDEX, INSIGHTS, ROUTINES
+from model_registry import LABELS
+from session_export import entry_report
+
+# ---------------------------
+# COMPACT, BOUNDED SESSION HISTORY
+# ---------------------------
+HISTORY_CAPACITY = 200
+
+# detected labels are stored as an index into this table; routines come from ROUTINES
+DETECTED = LABELS + ["Calm / Neutral"]
+_DETECTED_INDEX = {label: i for i, label in enumerate(DETECTED)}
+
+
+class HistoryEntry:
+    # one saved check; shared tables (labels, insights, routines) are referenced by index.
+    # A label or insight that isn't in this build's tables (read back from the history
+    # database) is kept as its text instead: detected_idx is then a str, insight_idx a
+    # (label, message) tuple. get()/[] keep the dict-style access the UI and export code use.
+    __slots__ = ("ts", "user_text", "detected_idx", "emotion_score", "scores", "insight_idx", "_report")
+
+    def __init__(self, ts, user_text, detected_idx, emotion_score, scores, insight_idx):
+        self.ts = ts
+        self.user_text = user_text
+        self.detected_idx = detected_idx
+        self.emotion_score = emotion_score
+        self.scores = scores  # probabilities in LABELS order
+        self.insight_idx = insight_idx
+        self._report = None
+
+    @property
+    def time(self):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.ts))
+
+    @property
+    def detected(self):
+        d = self.detected_idx
+        return DETECTED[d] if isinstance(d, int) else d
+
+    @property
+    def insight(self):
+        # (label, message), ("", "") when none was stored
+        i = self.insight_idx
+        if isinstance(i, tuple):
+            return i
+        return INSIGHTS[i] if i >= 0 else ("", "")
+
+    @property
+    def breakdown(self):
+        return {k.lower(): v for k, v in zip(LABELS, self.scores)}
+
+    @property
+    def insight_label(self):
+        return self.insight[0]
+
+    @property
+    def insight_message(self):
+        return self.insight[1]
+
+    @property
+    def routine(self):
+        return ROUTINES.get(self.detected, ROUTINES["Calm / Neutral"])
+
+    @property
+    def report(self):
+        # rendered on first export, then reused by later exports
+        if self._report is None:
+            self._report = entry_report(self)
+        return self._report
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def as_dict(self):
+        return {
+            "time": self.time,
+            "user_text": self.user_text,
+            "detected": self.detected,
+            "emotion_score": self.emotion_score,
+            "breakdown": self.breakdown,
+            "insight_label": self.insight_label,
+            "insight_message": self.insight_message,
+            "routine": list(self.routine),
+        }
+
+
+def make_entry(user_text, detected, emotion_score, probs, insight_label, insight_message, ts=None):
+    return HistoryEntry(
+        time.time() if ts is None else ts,
+        user_text,
+        _DETECTED_INDEX.get(detected, _DETECTED_INDEX["Calm / Neutral"]),
+        float(emotion_score),
+        tuple(float(probs.get(k, 0.0)) for k in LABELS),
+        INSIGHT_INDEX.get((insight_label, insight_message), -1),
+    )
+
+
+def entry_from_texts(ts, user_text, detected, emotion_score, scores, insight_label, insight_message):
+    # rebuild an entry from stored label/insight text (history_db); table indexes where they
+    # match this build, the text itself where they don't
+    pair = (insight_label or "", insight_message or "")
+    return HistoryEntry(
+        ts,
+        user_text,
+        _DETECTED_INDEX.get(detected, detected),
+        emotion_score,
+        tuple(scores),
+        INSIGHT_INDEX.get(pair, -1 if pair == ("", "") else pair),
+    )
+
+
+class SessionHistory:
+    # fixed-capacity ring buffer: O(1) append, newest-first iteration, oldest entries dropped
+    __slots__ = ("capacity", "_buf", "_head", "_size")
+
+    def __init__(self, capacity=HISTORY_CAPACITY):
+        self.capacity = capacity
+        self._buf = [None] * capacity
+        self._head = 0  # next write position
+        self._size = 0
+
+    def append(self, entry):
+        self._buf[self._head] = entry
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __getitem__(self, i):
+        # 0 = newest
+        if not -self._size <= i < self._size:
+            raise IndexError("history index out of range")
+        if i < 0:
+            i += self._size
+        return self._buf[(self._head - 1 - i) % self.capacity]
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self._buf[(self._head - 1 - i) % self.capacity]
+
+    def recent(self, n):
+        for i in range(min(n, self._size)):
+            yield self._buf[(self._head - 1 - i) % self.capacity]
+
+    def clear(self):
+        self._buf = [None] * self.capacity
+        self._head = 0
+        self._size = 0
@@ -0,0 +1,172 @@
+import bisect
+import os
+import threading
+import time
+
+# ---------------------------
+# PER-STAGE LATENCY HISTOGRAMS (opt-in)
+# ---------------------------
+# MINDFUL_METRICS=1 turns the timers on; MINDFUL_METRICS_FILE=metrics.prom also makes the
+# app rewrite a Prometheus text-format dump every few seconds. Off by default: timed()
+# then hands back one shared no-op context manager, so an instrumented stage costs a
+# function call and an attribute check.
+#
+#     with timed("transform"):
+#         X = vect.transform(texts)
+METRICS_ENV = "MINDFUL_METRICS"
+METRICS_FILE_ENV = "MINDFUL_METRICS_FILE"
+
+# bucket upper bounds in seconds: 10us .. ~60s, factor sqrt(2) apart
+BUCKETS = tuple(1e-5 * 2 ** (i / 2) for i in range(46))
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        # linear interpolation inside the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lo = BUCKETS[i - 1] if i else 0.0
+                hi = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return min(lo + (hi - lo) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+class StageMetrics:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._hists = {}
+        self._lock = threading.Lock()
+        # separate from _lock: render_prometheus() takes _lock, and a dump renders
+        self._dump_lock = threading.Lock()
+        self._last_dump = 0.0
+
+    def timer(self, stage):
+        if not self.enabled:
+            return _NOOP
+        return _Timer(self, stage)
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            hist = self._hists.get(stage)
+            if hist is None:
+                hist = self._hists[stage] = Histogram()
+            hist.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._hists = {}
+
+    def snapshot(self):
+        # [{stage, count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms, total_s}], slowest total first
+        with self._lock:
+            rows = [
+                {
+                    "stage": stage,
+                    "count": h.count,
+                    "mean_ms": round(h.sum / h.count * 1000, 3),
+                    "p50_ms": round(h.quantile(0.50) * 1000, 3),
+                    "p95_ms": round(h.quantile(0.95) * 1000, 3),
+                    "p99_ms": round(h.quantile(0.99) * 1000, 3),
+                    "max_ms": round(h.max * 1000, 3),
+                    "total_s": round(h.sum, 4),
+                }
+                for stage, h in self._hists.items() if h.count
+            ]
+        return sorted(rows, key=lambda r: -r["total_s"])
+
+    def render_prometheus(self, name="mindful_stage_seconds"):
+        lines = [
+            f"# HELP {name} Time spent in each processing stage.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            for stage in sorted(self._hists):
+                h = self._hists[stage]
+                label = stage.replace("\\", "\\\\").replace('"', '\\"')
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{stage="{label}",le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{label}",le="+Inf"}} {h.count}')
+                lines.append(f'{name}_sum{{stage="{label}"}} {h.sum!r}')
+                lines.append(f'{name}_count{{stage="{label}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        # atomic rewrite, so a scraper (e.g. node_exporter's textfile collector) never reads half a file;
+        # the tmp name is per process and thread, as in model_registry.write_manifest
+        with self._dump_lock:
+            self._dump(path)
+
+    def _dump(self, path):
+        tmp = f"{path}.tmp{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+        self._last_dump = time.monotonic()
+
+    def dump_every(self, path, interval=10.0):
+        # concurrent session reruns: one of them dumps, the others see the fresh _last_dump and skip
+        if not (path and self.enabled):
+            return
+        with self._dump_lock:
+            if time.monotonic() - self._last_dump >= interval:
+                self._dump(path)
+
+
+METRICS = StageMetrics(enabled=os.environ.get(METRICS_ENV, "") not in ("", "0"))
+
+
+def timed(stage):
+    return METRICS.timer(stage)
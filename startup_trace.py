@@ -0,0 +1,101 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# ---------------------------
+# IMPORT-TIME TRACE (where a cold worker's startup goes)
+# ---------------------------
+# python startup_trace.py                    (app.py's own imports, in a fresh interpreter)
+# python startup_trace.py --with-model       (plus loading the registry: unpickling pulls in sklearn/scipy)
+# python startup_trace.py --modules pandas streamlit --top 30 --json trace.json
+#
+# Runs the imports under `python -X importtime` and folds the per-module lines into a
+# table of the slowest modules (cumulative) and the packages that own the time (self).
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(BASE_DIR, "app.py")
+
+
+def app_imports(path=APP_FILE):
+    # module names app.py imports at top level, in order
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(a.name for a in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+    return list(dict.fromkeys(names))
+
+
+def trace_imports(modules, with_model=False, cwd=BASE_DIR):
+    # -> [(module, self_us, cumulative_us, depth)] in import order
+    code = "".join(f"import {m}\n" for m in modules)
+    if with_model:
+        code += "import model_registry\nmodel_registry.get_registry()\n"
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd, env=env,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cum_us), depth))
+    return rows
+
+
+def summarize(rows, top=20):
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    total_us = sum(self_us for _, self_us, _, _ in rows)
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "modules": len(rows),
+        "top_cumulative": [
+            {"module": n, "cumulative_ms": round(c / 1000, 1), "self_ms": round(s / 1000, 1)}
+            for n, s, c, _ in sorted(rows, key=lambda r: -r[2])[:top]
+        ],
+        "by_package": [
+            {"package": p, "self_ms": round(us / 1000, 1), "share": round(us / max(total_us, 1), 3)}
+            for p, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]
+        ],
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Import-time breakdown for app.py (or any modules).")
+    p.add_argument("--modules", nargs="*", help="modules to import (default: app.py's imports)")
+    p.add_argument("--with-model", action="store_true", help="also load the model registry")
+    p.add_argument("--top", type=int, default=15)
+    p.add_argument("--json", help="write the summary to this file")
+    args = p.parse_args(argv)
+
+    modules = args.modules or app_imports()
+    summary = summarize(trace_imports(modules, args.with_model), args.top)
+    summary["imports"] = modules
+    summary["with_model"] = args.with_model
+
+    print(f"{summary['modules']} modules imported in {summary['total_ms']} ms")
+    print("\nslowest modules (cumulative):")
+    for r in summary["top_cumulative"]:
+        print(f"  {r['cumulative_ms']:>9.1f} ms  {r['module']}")
+    print("\nby top-level package (self time):")
+    for r in summary["by_package"]:
+        print(f"  {r['self_ms']:>9.1f} ms  {r['share']:>6.1%}  {r['package']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
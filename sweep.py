@@ -0,0 +1,243 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import scipy.sparse as sp
+
+from evaluate import EVAL_CACHE_DIR, SEED, TEST_SIZE, cached_matrix, compute_metrics, load_split
+from preprocess import DATA_FILES
+
+# ---------------------------
+# HYPERPARAMETER SWEEP (one vectorizer fit per config, shared matrices, warm-started C paths)
+# ---------------------------
+# python sweep.py --max-features 5000 20000 --ngram 1,1 1,2 --C 0.1 0.3 1 3 10 \
+#                 --penalty l2 l1 --class-weight none balanced --out sweep_leaderboard.csv
+#
+# Each distinct vectorizer config is fitted once on the cached training split and its
+# train/test matrices are stored as .npz (same cache as evaluate.py). The matrices are
+# then copied once into shared memory; pool workers map them without pickling. A task is
+# one (vectorizer, penalty, class_weight) regularization path: C values are fitted in
+# increasing order with warm_start, each fit starting from the previous coefficients.
+DEFAULT_GRID = {
+    "max_features": [5000],
+    "ngram": ["1,2"],
+    "C": [0.1, 0.3, 1.0, 3.0, 10.0],
+    "penalty": ["l2"],
+    "class_weight": ["none"],
+}
+MAX_ITER = 300
+
+
+def vectorizer_params(max_features, ngram):
+    lo, hi = (int(x) for x in str(ngram).split(","))
+    return {"max_features": int(max_features), "ngram_range": (lo, hi), "stop_words": "english"}
+
+
+def _config_key(params, data_key):
+    blob = json.dumps({"data": data_key, **params}, sort_keys=True, default=list)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def build_matrices(split, params):
+    # (X_train, X_test) for one vectorizer config, fitted on the train split once and cached
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    key = _config_key(params, split.data_key)
+    train_file = os.path.join(split.split_dir, f"sweep-{key}-train.npz")
+    test_file = os.path.join(split.split_dir, f"sweep-{key}-test.npz")
+    if os.path.exists(train_file) and os.path.exists(test_file):
+        return sp.load_npz(train_file).tocsr(), sp.load_npz(test_file).tocsr(), True
+    vect = TfidfVectorizer(**params)
+    X_train = cached_matrix(train_file, lambda: vect.fit_transform(split.texts(split.train_idx)))
+    X_test = cached_matrix(test_file, lambda: vect.transform(split.texts(split.test_idx)))
+    return X_train, X_test, False
+
+
+# ---------------------------
+# SHARED-MEMORY ARRAYS
+# ---------------------------
+def _share(arr, blocks):
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+    blocks.append(shm)
+    return (shm.name, arr.dtype.str, arr.shape)
+
+
+def share_csr(X, blocks):
+    return {"shape": X.shape, "data": _share(X.data, blocks), "indices": _share(X.indices, blocks),
+            "indptr": _share(X.indptr, blocks)}
+
+
+_ATTACHED = {}  # worker side: shm name -> SharedMemory, kept open for the worker's lifetime
+
+
+def _attach(desc):
+    name, dtype, shape = desc
+    shm = _ATTACHED.get(name)
+    if shm is None:
+        shm = _ATTACHED[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+
+
+def attach_csr(desc):
+    return sp.csr_matrix((_attach(desc["data"]), _attach(desc["indices"]), _attach(desc["indptr"])),
+                         shape=desc["shape"], copy=False)
+
+
+# ---------------------------
+# WORKER: one regularization path
+# ---------------------------
+def _penalty_kwargs(penalty):
+    from sklearn.linear_model import LogisticRegression
+
+    solver = "saga" if penalty == "l1" else "lbfgs"
+    if LogisticRegression().get_params().get("penalty") == "deprecated":
+        # scikit-learn >= 1.8 expresses the penalty through l1_ratio
+        return {"l1_ratio": 1.0 if penalty == "l1" else 0.0, "solver": solver}
+    return {"penalty": penalty, "solver": solver}
+
+
+def fit_path(task):
+    from sklearn.exceptions import ConvergenceWarning
+    from sklearn.linear_model import LogisticRegression
+
+    X_train, X_test = attach_csr(task["X_train"]), attach_csr(task["X_test"])
+    y_train, y_test = _attach(task["y_train"]), _attach(task["y_test"])
+    classes = task["classes"]
+    model = LogisticRegression(C=task["Cs"][0], class_weight=task["class_weight"], max_iter=MAX_ITER,
+                               warm_start=True, **_penalty_kwargs(task["penalty"]))
+    results = []
+    for C in sorted(task["Cs"]):
+        model.set_params(C=C)
+        start = time.perf_counter()
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ConvergenceWarning)
+            model.fit(X_train, y_train)
+        fit_s = time.perf_counter() - start
+        probs = np.zeros((X_test.shape[0], len(classes)))
+        probs[:, model.classes_] = model.predict_proba(X_test)
+        metrics = compute_metrics(np.asarray(classes)[y_test], probs, classes)
+        results.append({
+            "vectorizer": task["vectorizer"],
+            "C": C,
+            "penalty": task["penalty"],
+            "class_weight": task["class_weight"] or "none",
+            "accuracy": metrics["accuracy"],
+            "macro_f1": metrics["macro"]["f1"],
+            "weighted_f1": metrics["weighted"]["f1"],
+            "log_loss": metrics["log_loss"],
+            "n_iter": int(np.max(model.n_iter_)),
+            "converged": not any(issubclass(w.category, ConvergenceWarning) for w in caught),
+            "fit_s": round(fit_s, 3),
+            "per_class_f1": {c: m["f1"] for c, m in metrics["per_class"].items()},
+        })
+    return results
+
+
+# ---------------------------
+# DRIVER
+# ---------------------------
+def run_sweep(grid, paths=DATA_FILES, workers=None, test_size=TEST_SIZE, seed=SEED, cache_dir=EVAL_CACHE_DIR,
+              log=print):
+    split = load_split(paths, test_size, seed, cache_dir)
+    classes = sorted(set(split.labels.tolist()))
+    codes = np.searchsorted(classes, split.labels).astype(np.int64)
+
+    blocks = []
+    try:
+        y_train = _share(codes[split.train_idx], blocks)
+        y_test = _share(codes[split.test_idx], blocks)
+        tasks = []
+        for max_features, ngram in itertools.product(grid["max_features"], grid["ngram"]):
+            params = vectorizer_params(max_features, ngram)
+            start = time.perf_counter()
+            X_train, X_test, cached = build_matrices(split, params)
+            log(f"vectorizer max_features={max_features} ngram={ngram}: {X_train.shape[1]} features, "
+                f"{'cached' if cached else 'fitted'} in {time.perf_counter() - start:.1f}s")
+            shared = {"X_train": share_csr(X_train, blocks), "X_test": share_csr(X_test, blocks)}
+            del X_train, X_test
+            for penalty, class_weight in itertools.product(grid["penalty"], grid["class_weight"]):
+                tasks.append({
+                    **shared,
+                    "y_train": y_train,
+                    "y_test": y_test,
+                    "classes": classes,
+                    "vectorizer": f"tfidf(max_features={max_features},ngram={ngram})",
+                    "penalty": penalty,
+                    "class_weight": None if class_weight == "none" else class_weight,
+                    "Cs": [float(c) for c in grid["C"]],
+                })
+
+        results = []
+        workers = workers or min(len(tasks), os.cpu_count() or 1)
+        if workers <= 1:
+            for task in tasks:
+                results.extend(fit_path(task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(fit_path, t) for t in tasks]
+                for fut in as_completed(futures):
+                    done = fut.result()
+                    results.extend(done)
+                    best = max(done, key=lambda r: r["macro_f1"])
+                    log(f"  {best['vectorizer']} {best['penalty']} cw={best['class_weight']}: "
+                        f"best macro-F1 {best['macro_f1']:.4f} at C={best['C']}")
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    return sorted(results, key=lambda r: (-r["macro_f1"], r["log_loss"]))
+
+
+def write_leaderboard(results, path):
+    tmp = f"{path}.tmp"
+    if path.endswith(".json"):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump([{"rank": i + 1, **r} for i, r in enumerate(results)], f, indent=2)
+    else:
+        columns = ["rank", "vectorizer", "C", "penalty", "class_weight", "macro_f1", "weighted_f1", "accuracy",
+                   "log_loss", "n_iter", "converged", "fit_s", "per_class_f1"]
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=columns)
+            w.writeheader()
+            for i, r in enumerate(results):
+                w.writerow({**r, "rank": i + 1, "per_class_f1": json.dumps(r["per_class_f1"], sort_keys=True)})
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Sweep TF-IDF + LogisticRegression settings on the cached split.")
+    p.add_argument("paths", nargs="*", default=DATA_FILES)
+    p.add_argument("--max-features", nargs="+", type=int, default=DEFAULT_GRID["max_features"])
+    p.add_argument("--ngram", nargs="+", default=DEFAULT_GRID["ngram"], help="e.g. 1,1 1,2")
+    p.add_argument("--C", nargs="+", type=float, default=DEFAULT_GRID["C"])
+    p.add_argument("--penalty", nargs="+", choices=["l2", "l1"], default=DEFAULT_GRID["penalty"])
+    p.add_argument("--class-weight", nargs="+", choices=["none", "balanced"], default=DEFAULT_GRID["class_weight"])
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--cache-dir", default=EVAL_CACHE_DIR, help="split, matrix and preprocessing caches")
+    p.add_argument("--out", default="sweep_leaderboard.csv", help=".csv or .json")
+    args = p.parse_args(argv)
+
+    grid = {"max_features": args.max_features, "ngram": args.ngram, "C": args.C,
+            "penalty": args.penalty, "class_weight": args.class_weight}
+    start = time.perf_counter()
+    results = run_sweep(grid, args.paths, args.workers, cache_dir=args.cache_dir)
+    write_leaderboard(results, args.out)
+    print(f"{len(results)} configs in {time.perf_counter() - start:.1f}s -> {args.out}")
+    for i, r in enumerate(results[:5]):
+        print(f"  #{i + 1} macro-F1 {r['macro_f1']:.4f}  {r['vectorizer']} C={r['C']} {r['penalty']} "
+              f"cw={r['class_weight']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
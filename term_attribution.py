@@ -0,0 +1,171 @@
+import numpy as np
+
+from model_registry import get_registry
+from prediction_cache import PredictionCache, cache_key
+from text_normalize import clean
+
+# ---------------------------
+# TERM ATTRIBUTION (which n-grams drove a prediction)
+# ---------------------------
+# For a linear model the class score is sum_j x_j * w[class, j] over the non-zero TF-IDF
+# entries x_j of the input, so each n-gram's contribution is exact: no sampling or
+# perturbation. Softmax models use coefficients centred across classes (adding the same
+# amount to every class changes nothing), binary models use +w / -w.
+#
+#     explain_text("I can't sleep and I panic before work")  -> [(term, weight), ...], largest first
+#     explain_many(texts, top_k=5)                           -> [(label, [(term, weight), ...]), ...]
+TOP_K = 5
+
+
+def _proba_mode(model):
+    from numpy_engine import _proba_mode as mode
+
+    if hasattr(model, "proba"):  # NumpyLogReg
+        return model.proba
+    try:
+        return mode(model)
+    except ValueError:
+        return "ovr"
+
+
+def class_weights(model):
+    # (n_classes, n_features) weights whose row k, dotted with a TF-IDF row, ranks terms for class k
+    # NumpyLogReg may hold int8/float32 rows; float_coef() undoes the quantization
+    coef = model.float_coef() if hasattr(model, "float_coef") else np.asarray(model.coef_, dtype=np.float64)
+    mode = _proba_mode(model)
+    if mode == "binary":
+        return np.vstack([-coef[0], coef[0]])
+    if mode == "softmax":
+        return coef - coef.mean(axis=0, keepdims=True)
+    return coef.copy()
+
+
+def reverse_vocabulary(vectorizer):
+    # column -> term, as an object array so a batch of columns maps to terms in one indexing step
+    terms = getattr(vectorizer, "terms", None)
+    if terms is None:
+        terms = [None] * len(vectorizer.vocabulary_)
+        for t, i in vectorizer.vocabulary_.items():
+            terms[i] = t
+    return np.asarray(terms, dtype=object)
+
+
+def _coo(X):
+    # (rows, cols, vals) of a scipy CSR matrix or numpy_engine.SparseRows
+    if hasattr(X, "indptr"):
+        rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+        return rows, X.indices, X.data
+    return X.rows, X.cols, X.vals
+
+
+class AttributionIndex:
+    # built once per loaded registry and cached on it, so a hot reload brings its own index
+    def __init__(self, model, vectorizer, class_index):
+        self.weights = np.ascontiguousarray(class_weights(model))
+        self.terms = reverse_vocabulary(vectorizer)
+        self.class_index = dict(class_index)
+        self.labels = [None] * len(self.class_index)
+        for label, i in self.class_index.items():
+            self.labels[i] = label
+
+    def explain_row(self, cols, vals, label, top_k=TOP_K):
+        # positive contributions toward `label`, largest first
+        if label not in self.class_index or not len(cols):
+            return []
+        contrib = vals * self.weights[self.class_index[label], cols]
+        k = min(top_k, len(contrib))
+        top = np.argpartition(-contrib, k - 1)[:k]
+        top = top[np.argsort(-contrib[top])]
+        top = top[contrib[top] > 0]
+        return list(zip(self.terms[cols[top]].tolist(), contrib[top].round(4).tolist()))
+
+    def explain_matrix(self, X, class_ids, top_k=TOP_K):
+        # one attribution list per row of X, for the class id given per row; no per-row loop
+        # over non-zeros: all contributions come from one gather and one lexsort
+        rows, cols, vals = _coo(X)
+        class_ids = np.asarray(class_ids)
+        contrib = vals * self.weights[class_ids[rows], cols]
+        order = np.lexsort((-contrib, rows))
+        rows, cols, contrib = rows[order], cols[order], contrib[order]
+        starts = np.searchsorted(rows, np.arange(X.shape[0]))
+        rank = np.arange(len(rows)) - starts[rows]
+        keep = (rank < top_k) & (contrib > 0)
+        out = [[] for _ in range(X.shape[0])]
+        for r, term, w in zip(rows[keep].tolist(), self.terms[cols[keep]].tolist(), contrib[keep].round(4).tolist()):
+            out[r].append((term, w))
+        return out
+
+
+def get_index(registry=None):
+    reg = registry or get_registry()
+    if not reg.ready or not hasattr(reg.model, "coef_"):
+        return None
+    if not (hasattr(reg.vectorizer, "vocabulary_") or hasattr(reg.vectorizer, "terms")):
+        return None  # hashed features have no way back to terms
+    index = getattr(reg, "_attribution_index", None)
+    if index is None:
+        index = reg._attribution_index = AttributionIndex(reg.model, reg.vectorizer, reg.class_index)
+    return index
+
+
+EXPLAIN_CACHE = PredictionCache(max_entries=512)
+
+
+def _explain_key(text, label, top_k, reg):
+    return cache_key(f"{label}\0{top_k}\0{clean(text)}", reg.fingerprint)
+
+
+def cached_explanation(text, label, registry=None, top_k=TOP_K, cache=EXPLAIN_CACHE):
+    # explain_text()'s cached answer, or None; lets a caller skip queueing work that would hit
+    reg = registry or get_registry()
+    hit = cache.get(_explain_key(text, label, top_k, reg))
+    return None if hit is None else list(hit)
+
+
+def explain_text(text, label=None, registry=None, top_k=TOP_K, cache=EXPLAIN_CACHE, row=None):
+    # top terms pushing `text` toward `label` (default: the predicted label); [] without a linear model.
+    # row: the text's TF-IDF (cols, vals) when the caller already has it
+    # (predict_with_model(..., return_row=True)), so only the gather below is left to do
+    reg = registry or get_registry()
+    index = get_index(reg)
+    if index is None:
+        return []
+    key = None
+    if cache is not None:
+        key = _explain_key(text, label, top_k, reg)
+        hit = cache.get(key)
+        if hit is not None:
+            return list(hit)
+    if row is None or label is None:
+        X = reg.vectorizer.transform([clean(text)])
+        if label is None:
+            label = index.labels[int(reg.model.predict_proba(X)[0].argmax())]
+        _, cols, vals = _coo(X)
+    else:
+        cols, vals = row
+    terms = index.explain_row(cols, vals, label, top_k)
+    if key is not None:
+        cache.put(key, tuple(terms))
+    return terms
+
+
+def explain_matrix(X, labels, registry=None, top_k=TOP_K):
+    # attributions for an already transformed batch and its labels (e.g. from
+    # predict_many(..., return_matrix=True)), so an audit doesn't transform twice; None without a linear model
+    reg = registry or get_registry()
+    index = get_index(reg)
+    if index is None:
+        return None
+    class_ids = [index.class_index[label] for label in labels]
+    return index.explain_matrix(X, class_ids, top_k)
+
+
+def explain_many(texts, registry=None, top_k=TOP_K):
+    # batch form for offline audits: one transform, one predict_proba, one attribution pass
+    reg = registry or get_registry()
+    index = get_index(reg)
+    if index is None:
+        return None
+    X = reg.vectorizer.transform([clean(t) for t in texts])
+    class_ids = reg.model.predict_proba(X).argmax(axis=1)
+    return list(zip([index.labels[i] for i in class_ids], index.explain_matrix(X, class_ids, top_k)))
@@ -0,0 +1,49 @@
+import re
+from collections import namedtuple
+
+# ---------------------------
+# SHARED TEXT NORMALIZER (training + serving)
+# ---------------------------
+# One compiled pass over the lowercased text: every run of letters/apostrophes is a
+# token and everything else separates tokens. URLs (http..., www...) are skipped; the
+# slower URL-aware pattern only runs when the text can contain one. Apostrophes are
+# then dropped inside tokens ("can't" -> "cant"), which is what the notebook's
+# clean_text did when the shipped vectorizer was fitted.
+# bump whenever the output of clean()/normalize() changes; cached preprocessing keys on it
+CLEANER_VERSION = "2"
+
+_WORD_RE = re.compile(r"[a-z']+")
+_URL_AWARE_RE = re.compile(r"(?:http|www)\S+|((?:(?!(?:http|www)\S)[a-z'])+)")
+
+NormalizedText = namedtuple("NormalizedText", ["cleaned", "tokens", "token_set"])
+
+_EMPTY = NormalizedText("", (), frozenset())
+
+
+def tokenize(text):
+    if not isinstance(text, str):
+        return []
+    t = text.lower()
+    if "http" in t or "www" in t:
+        tokens = [m for m in _URL_AWARE_RE.findall(t) if m]
+    else:
+        tokens = _WORD_RE.findall(t)
+    if "'" in t:
+        tokens = [w for w in (m.replace("'", "") for m in tokens) if w]
+    return tokens
+
+
+def clean(text):
+    if isinstance(text, NormalizedText):
+        return text.cleaned
+    return " ".join(tokenize(text))
+
+
+def normalize(text):
+    # run once per input; predict, fallback and metrics all read from the result
+    if isinstance(text, NormalizedText):
+        return text
+    tokens = tokenize(text)
+    if not tokens:
+        return _EMPTY
+    return NormalizedText(" ".join(tokens), tuple(tokens), frozenset(tokens))
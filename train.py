@@ -0,0 +1,192 @@
+import argparse
+import json
+import os
+import time
+from collections import Counter
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from compact_vectorizer import compact_vectorizer
+from evaluate import SEED, TEST_SIZE, load_split
+from model_registry import publish
+from preprocess import map_labels
+from text_normalize import clean
+
+# ---------------------------
+# OUT-OF-CORE TRAINING (chunked reads + partial_fit)
+# ---------------------------
+# python train.py "mental_health.csv" "mental-health (1).csv" --out-dir artifacts/
+# python train.py data/*.csv --features hashing --epochs 3
+#
+# Rows are streamed in chunks and never concatenated. The output directory gets the
+# model, the vectorizer and a model_manifest.json the app's registry can load.
+#
+# The held-out rows are evaluate.py's (the notebook's stratified test_size/random_state split
+# over the preprocessed corpus), so `evaluate.py --model artifacts/...` scores a trained model
+# only on rows it never saw; the split is recorded in the manifest's "training" entry.
+DATA_FILES = ["mental_health.csv", "mental-health (1).csv"]
+CLASSES = np.array(["anxiety", "depression", "suicide"])
+# the tf/df counters are cut back to their most frequent half once they track this many
+# n-grams, so pass 1 stays bounded however large the corpus is
+MAX_TRACKED_TERMS = 1_000_000
+
+
+def holdout_mask(paths, test_size=TEST_SIZE, seed=SEED):
+    # -> (bool array over corpus rows, {path: index of its first row}, split info); rows are
+    # numbered the way preprocess.py reads them (files in order, empty rows dropped)
+    split = load_split(paths, test_size, seed)
+    mask = np.zeros(len(split.labels), dtype=bool)
+    mask[split.test_idx] = True
+    sources = pd.read_parquet(split.pre_dir, columns=["source"])["source"].astype(str)
+    counts = sources.value_counts()
+    offsets, start = {}, 0
+    for p in paths:
+        offsets[p] = start
+        start += int(counts.get(os.path.basename(p), 0))
+    info = {"test_size": test_size, "seed": seed, "data_key": split.data_key}
+    return mask, offsets, info
+
+
+def iter_chunks(paths, chunksize, offsets, seed=42):
+    # round-robin over the files so one class-sorted file doesn't dominate a stretch of
+    # updates; rows are shuffled inside each chunk. Yields (texts, labels, corpus row numbers).
+    readers = {p: pd.read_csv(p, chunksize=chunksize) for p in paths}
+    next_row = dict(offsets)
+    rng = np.random.default_rng(seed)
+    while readers:
+        for p, reader in list(readers.items()):
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                del readers[p]
+                continue
+            chunk = chunk.iloc[:, :2]
+            chunk.columns = ["text", "label"]
+            chunk = chunk.dropna(subset=["text", "label"])
+            texts = [clean(t) for t in chunk["text"]]
+            labels = [map_labels(x) for x in chunk["label"]]
+            rows = np.arange(next_row[p], next_row[p] + len(texts))
+            next_row[p] += len(texts)
+            order = rng.permutation(len(texts))
+            yield [texts[i] for i in order], np.array(labels)[order], rows[order]
+
+
+def split(texts, labels, rows, mask):
+    held = mask[rows]
+    train_idx, test_idx = np.flatnonzero(~held), np.flatnonzero(held)
+    return ([texts[i] for i in train_idx], labels[train_idx]), ([texts[i] for i in test_idx], labels[test_idx])
+
+
+def _prune(tf, df, keep):
+    # drop all but the `keep` most frequent n-grams (a term first seen after its peers were
+    # pruned can be undercounted; with keep far above max_features the top terms are unaffected)
+    kept = tf.most_common(keep)
+    tf.clear()
+    tf.update(dict(kept))
+    for t in [t for t in df if t not in tf]:
+        del df[t]
+
+
+def fit_streaming_tfidf(paths, chunksize, mask, offsets, max_features=5000, ngram_range=(1, 2),
+                        max_tracked=MAX_TRACKED_TERMS):
+    # pass 1: term and document frequencies per chunk, then the same top-max_features
+    # selection and smoothed idf TfidfVectorizer computes in memory
+    analyzer = TfidfVectorizer(ngram_range=ngram_range, stop_words="english").build_analyzer()
+    tf, df = Counter(), Counter()
+    n_docs = 0
+    for texts, labels, rows in iter_chunks(paths, chunksize, offsets):
+        (train_texts, _), _ = split(texts, labels, rows, mask)
+        for t in train_texts:
+            grams = analyzer(t)
+            tf.update(grams)
+            df.update(set(grams))
+        n_docs += len(train_texts)
+        if len(tf) > max_tracked:
+            _prune(tf, df, max(max_features, max_tracked // 2))
+
+    terms = sorted(t for t, _ in sorted(tf.items(), key=lambda kv: (-kv[1], kv[0]))[:max_features])
+    vect = TfidfVectorizer(ngram_range=ngram_range, stop_words="english", vocabulary=terms)
+    vect.fit([""])  # sets up vocabulary_; idf_ is replaced below
+    dfs = np.array([df[t] for t in terms], dtype=np.float64)
+    vect.idf_ = np.log((1 + n_docs) / (1 + dfs)) + 1
+    return vect
+
+
+def build_vectorizer(kind, paths, chunksize, mask, offsets, n_features):
+    if kind == "hashing":
+        # stateless: no vocabulary pass, no fitted state to keep in sync
+        return HashingVectorizer(n_features=n_features, ngram_range=(1, 2), stop_words="english",
+                                 alternate_sign=False, norm="l2")
+    return fit_streaming_tfidf(paths, chunksize, mask, offsets)
+
+
+def train(paths, out_dir, features="tfidf", chunksize=20000, epochs=2, test_size=TEST_SIZE, alpha=1e-5,
+          loss="log_loss", n_features=2 ** 20, seed=SEED):
+    start = time.perf_counter()
+    mask, offsets, split_info = holdout_mask(paths, test_size, seed)
+    vect = build_vectorizer(features, paths, chunksize, mask, offsets, n_features)
+    model = SGDClassifier(loss=loss, alpha=alpha, random_state=42)
+
+    n_train = 0
+    for epoch in range(epochs):
+        for texts, labels, rows in iter_chunks(paths, chunksize, offsets, seed=42 + epoch):
+            (train_texts, train_labels), _ = split(texts, labels, rows, mask)
+            if len(train_texts):
+                model.partial_fit(vect.transform(train_texts), train_labels, classes=CLASSES)
+                if epoch == 0:
+                    n_train += len(train_texts)
+
+    correct = n_test = 0
+    for texts, labels, rows in iter_chunks(paths, chunksize, offsets):
+        _, (test_texts, test_labels) = split(texts, labels, rows, mask)
+        if len(test_texts):
+            correct += int((model.predict(vect.transform(test_texts)) == test_labels).sum())
+            n_test += len(test_texts)
+
+    os.makedirs(out_dir, exist_ok=True)
+    model_path = os.path.join(out_dir, "mental_health_model.pkl")
+    vect_path = os.path.join(out_dir, "tfidf_vectorizer.pkl")
+    joblib.dump(model, model_path)
+    # fitted TF-IDF state is written compacted (float32 idf, packed vocabulary)
+    joblib.dump(compact_vectorizer(vect) if features == "tfidf" else vect, vect_path)
+    training = {
+        "features": features,
+        "loss": loss,
+        "alpha": alpha,
+        "epochs": epochs,
+        "split": split_info,
+        "train_rows": n_train,
+        "test_rows": n_test,
+        "accuracy": round(correct / n_test, 4) if n_test else None,
+        "seconds": round(time.perf_counter() - start, 1),
+    }
+    manifest = publish(model_path, vect_path, os.path.join(out_dir, "model_manifest.json"),
+                       version=time.strftime("train-%Y%m%d-%H%M%S"), extra={"training": training})
+    return manifest
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Train the emotion classifier out of core.")
+    p.add_argument("paths", nargs="*", default=DATA_FILES)
+    p.add_argument("--out-dir", default="artifacts")
+    p.add_argument("--features", choices=["tfidf", "hashing"], default="tfidf")
+    p.add_argument("--chunksize", type=int, default=20000)
+    p.add_argument("--epochs", type=int, default=2)
+    p.add_argument("--test-size", type=float, default=TEST_SIZE, help="held-out share (evaluate.py's split)")
+    p.add_argument("--seed", type=int, default=SEED, help="split seed (evaluate.py's)")
+    p.add_argument("--alpha", type=float, default=1e-5)
+    p.add_argument("--loss", choices=["log_loss", "modified_huber"], default="log_loss")
+    p.add_argument("--n-features", type=int, default=2 ** 20, help="hashing space size")
+    args = p.parse_args(argv)
+
+    manifest = train(args.paths, args.out_dir, args.features, args.chunksize, args.epochs,
+                     args.test_size, args.alpha, args.loss, args.n_features, args.seed)
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()